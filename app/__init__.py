@@ -2,8 +2,6 @@ from flask import Flask
 from flask_login import LoginManager
 from flask_sqlalchemy import SQLAlchemy
 import os
-import logging
-from logging.handlers import RotatingFileHandler
 from config import Config
 
 # Verify if db needs to be imported from models or defined here.
@@ -11,13 +9,31 @@ from config import Config
 # In models.py: db = SQLAlchemy()
 # So we import db from .models
 from .models import db, User
+from .cache import init_cache
+from .user_cache import init_user_cache, load_cached_user
+from .page_cache import init_page_cache
+from .engine import init_engine
+from .metrics import init_metrics
+from .log import init_logging
+# Import rollup untuk mendaftarkan listener before_flush yang menjaga laporan_rollup
+from . import rollup
+# Listener yang menaikkan change token data_version
+from . import versioning
 
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
     
+    # Logging dipasang pertama supaya request id tersedia untuk hook lain
+    init_logging(app)
+
     # Initialize extensions
     db.init_app(app)
+    init_engine(app, db)
+    init_metrics(app, db)
+    init_cache(app)
+    init_user_cache(app)
+    init_page_cache(app)
     
     # Setup Login Manager
     login_manager = LoginManager()
@@ -26,9 +42,8 @@ def create_app(config_class=Config):
     login_manager.login_message = 'Silakan login untuk mengakses halaman ini.'
     login_manager.login_message_category = 'info'
     
-    @login_manager.user_loader
-    def load_user(user_id):
-        return User.query.get(int(user_id))
+    # Snapshot user di-cache per proses; lihat app/user_cache.py
+    login_manager.user_loader(load_cached_user)
     
     # Register Blueprints
     from .auth import bp as auth_bp
@@ -43,17 +58,14 @@ def create_app(config_class=Config):
     from .users import bp as users_bp
     app.register_blueprint(users_bp)
     
-    # Setup logging
+    from .api import bp as api_bp
+    app.register_blueprint(api_bp)
+    
+    # Register CLI commands (flask --app run <command>)
+    from .commands import register_commands
+    register_commands(app)
+    
     if not app.debug and not app.testing:
-        if not os.path.exists('logs'):
-            os.mkdir('logs')
-        file_handler = RotatingFileHandler('logs/bap_simrs.log', maxBytes=10240, backupCount=10)
-        file_handler.setFormatter(logging.Formatter(
-            '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
-        ))
-        file_handler.setLevel(logging.INFO)
-        app.logger.addHandler(file_handler)
-        app.logger.setLevel(logging.INFO)
         app.logger.info('BAP SIMRS startup')
         
     return app
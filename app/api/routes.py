@@ -0,0 +1,137 @@
+"""
+JSON API v1 untuk integrasi (pengganti scraping HTML dashboard).
+
+GET /api/v1/laporan menerima parameter pencarian yang sama dengan dashboard
+(build_search_query), ditambah:
+- fields: daftar kolom dipisah koma; hanya kolom ini yang di-SELECT
+- limit: jumlah baris per halaman (maks API_MAX_LIMIT)
+- cursor: next_cursor/prev_cursor dari response sebelumnya
+- include_total=1: tambahkan jumlah total hasil (satu query COUNT)
+
+ETag dibangun dari change token data_version + parameter request, sehingga
+polling yang datanya belum berubah dijawab 304 tanpa query data dan tanpa
+serialisasi. Response besar dikompres brotli (jika package brotli
+terpasang) atau gzip sesuai Accept-Encoding.
+"""
+import gzip
+import hashlib
+from datetime import date, datetime
+from flask import request, jsonify, current_app
+from app.models import Laporan
+from app.pagination import KeysetPagination, KEYSET_SORT_COLUMNS, InvalidCursor, decode_cursor
+from app.utils import build_search_query, project_search_rows
+from app.versioning import get_data_version
+from . import bp
+
+try:
+    import brotli
+except ImportError:  # brotli opsional; tanpa package ini hanya gzip
+    brotli = None
+
+API_FIELDS = ('id', 'unit', 'pelapor', 'modul_simrs', 'jenis_kesalahan', 'deskripsi',
+              'tgl_kejadian', 'bukti_file', 'status', 'created_at', 'updated_at',
+              'created_by', 'assigned_to')
+DEFAULT_API_FIELDS = ('id', 'unit', 'pelapor', 'jenis_kesalahan', 'tgl_kejadian',
+                      'status', 'created_at')
+
+
+def _error(message, status=400):
+    return jsonify({'error': message}), status
+
+
+def _serialize(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _request_etag(version):
+    """ETag weak: sama untuk versi data dan parameter yang sama (apa pun encoding-nya)"""
+    params = '&'.join(f'{key}={value}' for key, value in sorted(request.args.items(multi=True)))
+    return hashlib.sha1(f'v1:{version}:{request.path}?{params}'.encode('utf-8')).hexdigest()
+
+
+@bp.route("/laporan")
+# @login_required  # DISABLED for development
+def list_laporan():
+    """Daftar laporan (JSON) dengan projection, cursor pagination dan ETag"""
+    fields = request.args.get('fields')
+    if fields:
+        fields = [name.strip() for name in fields.split(',') if name.strip()]
+        unknown = [name for name in fields if name not in API_FIELDS]
+        if unknown:
+            return _error(f"Field tidak dikenal: {', '.join(unknown)}. "
+                          f"Field yang tersedia: {', '.join(API_FIELDS)}")
+    else:
+        fields = list(DEFAULT_API_FIELDS)
+
+    max_limit = current_app.config.get('API_MAX_LIMIT', 500)
+    limit = request.args.get('limit', current_app.config.get('API_DEFAULT_LIMIT', 50), type=int)
+    limit = min(max(limit, 1), max_limit)
+
+    sort_by = request.args.get('sort_by', 'id')
+    if sort_by not in KEYSET_SORT_COLUMNS:
+        sort_by = 'id'
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            decode_cursor(cursor, sort_by, getattr(Laporan, sort_by))
+        except InvalidCursor:
+            return _error('Cursor tidak valid untuk urutan ini')
+
+    # Data belum berubah sejak response sebelumnya: 304 tanpa query data
+    version, updated_at = get_data_version()
+    etag = _request_etag(version)
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+    else:
+        # Kolom id dan kolom sort selalu di-SELECT untuk membangun cursor
+        columns = list(dict.fromkeys(fields + ['id', sort_by]))
+        rows = project_search_rows(build_search_query(request.args), columns, with_users=False)
+        page = KeysetPagination(
+            rows, Laporan,
+            sort_by=sort_by,
+            sort_order=request.args.get('sort_order', 'asc'),
+            cursor=cursor,
+            per_page=limit
+        )
+
+        body = {
+            'data': [{name: _serialize(getattr(row, name)) for name in fields} for row in page.items],
+            'fields': fields,
+            'limit': limit,
+            'next_cursor': page.next_cursor,
+            'prev_cursor': page.prev_cursor,
+        }
+        if request.args.get('include_total') == '1':
+            body['total'] = page.total
+        response = jsonify(body)
+
+    response.set_etag(etag, weak=True)
+    if updated_at is not None:
+        response.last_modified = updated_at
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+@bp.after_request
+def compress_response(response):
+    """Kompres body JSON dengan brotli/gzip sesuai Accept-Encoding"""
+    response.vary.add('Accept-Encoding')
+    if response.status_code != 200 or response.direct_passthrough \
+            or 'Content-Encoding' in response.headers:
+        return response
+
+    data = response.get_data()
+    if len(data) < current_app.config.get('API_COMPRESS_MIN_SIZE', 1024):
+        return response
+
+    accept = request.accept_encodings
+    if brotli is not None and accept['br']:
+        response.set_data(brotli.compress(data, quality=4))
+        response.headers['Content-Encoding'] = 'br'
+    elif accept['gzip']:
+        response.set_data(gzip.compress(data, compresslevel=6))
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
@@ -0,0 +1,130 @@
+"""
+Cache sederhana dengan backend yang bisa diganti lewat config.
+
+- ``memory``: dict per proses (default), cepat tapi tidak dibagi antar worker
+- ``file``: file pickle di CACHE_DIR, dibagi antar worker gunicorn di host yang sama
+- ``redis``: server Redis di CACHE_REDIS_URL (butuh package ``redis``)
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+from flask import current_app
+
+
+class MemoryCache:
+    """Cache dict per proses dengan TTL"""
+
+    def __init__(self, default_timeout=300):
+        self.default_timeout = default_timeout
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires and expires < time.time():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value, timeout=None):
+        timeout = self.default_timeout if timeout is None else timeout
+        expires = time.time() + timeout if timeout else 0
+        with self._lock:
+            self._data[key] = (expires, value)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class FileCache:
+    """Cache berbasis file; penulisan atomik lewat os.replace"""
+
+    def __init__(self, directory, default_timeout=300):
+        self.directory = directory
+        self.default_timeout = default_timeout
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest())
+
+    def get(self, key):
+        try:
+            with open(self._path(key), 'rb') as f:
+                expires, value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        if expires and expires < time.time():
+            self.delete(key)
+            return None
+        return value
+
+    def set(self, key, value, timeout=None):
+        timeout = self.default_timeout if timeout is None else timeout
+        expires = time.time() + timeout if timeout else 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump((expires, value), f, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+
+class RedisCache:
+    """Cache di server Redis, dibagi antar worker dan antar host"""
+
+    def __init__(self, url, default_timeout=300, key_prefix='bap_simrs:'):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.default_timeout = default_timeout
+        self.key_prefix = key_prefix
+
+    def get(self, key):
+        value = self.client.get(self.key_prefix + key)
+        return pickle.loads(value) if value is not None else None
+
+    def set(self, key, value, timeout=None):
+        timeout = self.default_timeout if timeout is None else timeout
+        self.client.set(self.key_prefix + key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+                        ex=timeout or None)
+
+    def delete(self, key):
+        self.client.delete(self.key_prefix + key)
+
+
+def init_cache(app):
+    """Pilih backend cache sesuai CACHE_BACKEND dan simpan di app.extensions"""
+    backend = app.config.get('CACHE_BACKEND', 'memory')
+    timeout = app.config.get('CACHE_DEFAULT_TIMEOUT', 300)
+
+    if backend == 'file':
+        cache = FileCache(app.config['CACHE_DIR'], default_timeout=timeout)
+    elif backend == 'redis':
+        cache = RedisCache(app.config['CACHE_REDIS_URL'], default_timeout=timeout)
+    else:
+        # Worker lain tidak ikut terinvalidasi; TTL pendek membatasi umur data basi
+        timeout = min(timeout, app.config.get('CACHE_MEMORY_TIMEOUT', 60))
+        cache = MemoryCache(default_timeout=timeout)
+
+    app.extensions['cache'] = cache
+    return cache
+
+
+def get_cache():
+    return current_app.extensions['cache']
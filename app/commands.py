@@ -0,0 +1,88 @@
+"""
+Perintah CLI aplikasi, dijalankan dengan:
+    flask --app run <command>
+"""
+import os
+import sys
+import time
+import click
+from app.rollup import rebuild_rollup
+
+
+def register_commands(app):
+    @app.cli.command('rebuild-rollup')
+    def rebuild_rollup_command():
+        """Hitung ulang tabel rollup statistik dari tabel laporan."""
+        rows = rebuild_rollup()
+        click.echo(f'Rollup statistik dibangun ulang: {rows} baris')
+
+    @app.cli.command('cleanup-uploads')
+    @click.option('--verify', is_flag=True, help='Cek juga sha256 file bukti yang masih dipakai laporan.')
+    def cleanup_uploads_command(verify):
+        """Hapus file bukti yang tidak lagi dipakai laporan mana pun."""
+        from app.utils import cleanup_unreferenced_uploads, find_corrupt_uploads
+
+        removed = cleanup_unreferenced_uploads()
+        click.echo(f'{removed} file bukti tanpa referensi dihapus')
+        if verify:
+            corrupt = find_corrupt_uploads()
+            for name in corrupt:
+                click.echo(f'Hilang atau rusak: {name}', err=True)
+            if corrupt:
+                raise click.ClickException(f'{len(corrupt)} file bukti hilang atau rusak')
+            click.echo('Semua file bukti yang dipakai laporan utuh')
+
+    @app.cli.command('import-laporan')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--batch-size', default=1000, show_default=True, help='Jumlah baris per transaksi insert.')
+    @click.option('--errors', 'errors_path', type=click.Path(dir_okay=False),
+                  help='Tulis laporan error per baris ke file CSV ini.')
+    @click.option('--dry-run', is_flag=True, help='Hanya validasi, tanpa insert.')
+    def import_laporan_command(path, batch_size, errors_path, dry_run):
+        """Import laporan massal dari file CSV atau XLSX."""
+        from app.importer import ImportFileError, import_laporan, iter_import_rows, write_error_report
+
+        started = time.perf_counter()
+        with open(path, 'rb') as f:
+            try:
+                result = import_laporan(iter_import_rows(f, path), batch_size=batch_size, dry_run=dry_run)
+            except ImportFileError as e:
+                raise click.ClickException(str(e))
+        elapsed = time.perf_counter() - started
+
+        label = 'valid (dry run)' if dry_run else 'diimport'
+        click.echo(f"{result['inserted']} dari {result['total']} baris {label} dalam {elapsed:.1f} detik")
+        if result['errors']:
+            click.echo(f"{len(result['errors'])} error validasi", err=True)
+            if errors_path:
+                with open(errors_path, 'w', newline='', encoding='utf-8') as out:
+                    write_error_report(result['errors'], out)
+                click.echo(f'Laporan error ditulis ke {errors_path}', err=True)
+            else:
+                write_error_report(result['errors'][:20], sys.stderr)
+
+    @app.cli.command('seed-laporan')
+    @click.option('--rows', default=10000, show_default=True, help='Jumlah laporan sintetis (10k - 1M).')
+    @click.option('--seed', 'seed_value', default=42, show_default=True, help='Seed random; sama = data identik.')
+    @click.option('--days', default=365, show_default=True, help='Rentang tanggal kejadian ke belakang.')
+    @click.option('--users', default=20, show_default=True, help='Jumlah user sintetis untuk created_by/assigned_to.')
+    @click.option('--batch-size', default=10000, show_default=True, help='Jumlah baris per transaksi insert.')
+    @click.option('--yes', is_flag=True, help='Lewati konfirmasi saat FLASK_ENV=production.')
+    def seed_laporan_command(rows, seed_value, days, users, batch_size, yes):
+        """Isi tabel laporan dengan data sintetis untuk uji beban/benchmark."""
+        from app.seed import seed_laporan
+
+        if os.environ.get('FLASK_ENV') == 'production' and not yes:
+            click.confirm(f'Tambah {rows} laporan sintetis ke database production?', abort=True)
+
+        started = time.perf_counter()
+        with click.progressbar(length=rows, label='Seeding laporan') as bar:
+            state = {'done': 0}
+
+            def progress(inserted):
+                bar.update(inserted - state['done'])
+                state['done'] = inserted
+
+            inserted = seed_laporan(rows, seed=seed_value, days=days, users=users,
+                                    batch_size=batch_size, progress=progress)
+        click.echo(f'{inserted} laporan sintetis dibuat dalam {time.perf_counter() - started:.1f} detik')
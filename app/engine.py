@@ -0,0 +1,50 @@
+"""
+Pengaturan koneksi database per engine.
+
+Untuk SQLite, PRAGMA di SQLITE_PRAGMAS dijalankan pada setiap koneksi baru
+(journal_mode WAL, synchronous, busy_timeout, cache_size). Dalam mode WAL
+pembaca membaca snapshot terakhir yang sudah commit dan tidak menunggu
+transaksi tulis seperti tambah_laporan atau import. Pool untuk Postgres
+diatur lewat SQLALCHEMY_ENGINE_OPTIONS di config.py; dispose_engines()
+dipanggil gunicorn setelah fork (lihat gunicorn.conf.py).
+"""
+from sqlalchemy import event
+
+
+def _apply_sqlite_pragmas(pragmas):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+    return on_connect
+
+
+def init_engine(app, db):
+    """Pasang listener koneksi pada engine app (panggil setelah db.init_app)"""
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name == 'sqlite':
+        pragmas = app.config.get('SQLITE_PRAGMAS') or {}
+        if pragmas:
+            event.listen(engine, 'connect', _apply_sqlite_pragmas(pragmas))
+    return engine
+
+
+def sqlite_pragma(engine, name):
+    """Nilai PRAGMA aktif pada koneksi baru (untuk pengecekan/benchmark)"""
+    with engine.connect() as conn:
+        return conn.exec_driver_sql(f'PRAGMA {name}').scalar()
+
+
+def dispose_engines(app, db):
+    """
+    Buang pool koneksi yang diwarisi dari proses master setelah fork
+    (gunicorn preload_app). close=False: koneksi milik master tidak ditutup
+    dari worker, worker membuka koneksinya sendiri saat dibutuhkan.
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
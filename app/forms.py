@@ -1,8 +1,8 @@
 from flask_wtf import FlaskForm
 from flask_wtf.file import FileField, FileAllowed, FileSize
-from wtforms import StringField, TextAreaField, SelectField, DateTimeLocalField, PasswordField, RadioField
+from wtforms import StringField, TextAreaField, SelectField, DateTimeLocalField, PasswordField, RadioField, HiddenField
 from wtforms.fields import DateField
-from wtforms.validators import DataRequired, Length, Email, Optional
+from wtforms.validators import DataRequired, Length, Email, Optional, ValidationError
 from config import Config
 
 class LoginForm(FlaskForm):
@@ -136,9 +136,58 @@ class EditStatusForm(FlaskForm):
     
     def __init__(self, *args, **kwargs):
         super(EditStatusForm, self).__init__(*args, **kwargs)
-        # Populate assigned_to choices with users
-        from app.models import User
-        self.assigned_to.choices = [(0, 'Tidak ada')] + [(u.id, u.username) for u in User.query.all()]
+        # Populate assigned_to choices dari cache (id, username) user aktif;
+        # direktori user besar memakai lookup /users/assignees
+        from app.utils import get_assignee_choices
+        choices, complete = get_assignee_choices()
+        self.assignee_lookup = not complete
+        self.assigned_to.choices = [(0, 'Tidak ada')] + choices
+        self.current_assignee = None
+        if self.assignee_lookup:
+            self.assigned_to.validate_choice = False
+    
+    def include_assignee(self, user_id, current=False):
+        """
+        Pastikan user ada di choices: user terpilih (mode lookup) atau assignee
+        laporan saat ini (current=True), termasuk user yang sudah dinonaktifkan
+        supaya assignment tidak hilang saat hanya status yang diubah.
+        """
+        from app.user_cache import load_cached_user
+        if current:
+            self.current_assignee = user_id
+        if not user_id or any(value == user_id for value, label in self.assigned_to.choices):
+            return
+        user = load_cached_user(user_id)
+        if user is not None:
+            label = user.username if user.is_active else f'{user.username} (nonaktif)'
+            self.assigned_to.choices.append((user.id, label))
+    
+    def validate_assigned_to(self, field):
+        # Assignee lama yang sudah nonaktif boleh dipertahankan, tidak boleh dipilih baru
+        if self.assignee_lookup and field.data and field.data != self.current_assignee:
+            from app.user_cache import load_cached_user
+            user = load_cached_user(field.data)
+            if user is None or not user.is_active:
+                raise ValidationError('User tidak ditemukan atau tidak aktif')
+
+class BulkUpdateForm(FlaskForm):
+    """Aksi massal dashboard: ubah status/assign laporan terpilih atau semua hasil pencarian"""
+    status = SelectField('Status',
+        choices=[('', 'Status tidak diubah')] + EditStatusForm.status.kwargs['choices'],
+        validators=[Optional()]
+    )
+    assigned_to = SelectField('Assign ke',
+        choices=[],  # Will be populated dynamically
+        validators=[Optional()],
+        coerce=int
+    )
+    scope = HiddenField(default='selected')
+    
+    def __init__(self, *args, **kwargs):
+        super(BulkUpdateForm, self).__init__(*args, **kwargs)
+        from app.utils import get_assignee_choices
+        choices, complete = get_assignee_choices()
+        self.assigned_to.choices = [(-1, 'Assignment tidak diubah'), (0, 'Tidak ada')] + choices
 
 class SearchForm(FlaskForm):
     search_query = StringField('Pencarian', validators=[
@@ -182,7 +231,8 @@ class SearchForm(FlaskForm):
             ('unit', 'Unit'),
             ('pelapor', 'Pelapor'),
             ('status', 'Status'),
-            ('jenis_kesalahan', 'Jenis Kesalahan')
+            ('jenis_kesalahan', 'Jenis Kesalahan'),
+            ('relevance', 'Relevansi Pencarian')
         ],
         default='id',
         validators=[Optional()]
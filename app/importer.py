@@ -0,0 +1,243 @@
+"""
+Import laporan massal dari CSV/XLSX (migrasi backlog spreadsheet lama).
+
+Baris dibaca secara streaming (csv reader / openpyxl read-only), divalidasi
+dengan aturan yang sama seperti LaporanForm, lalu di-insert per batch
+memakai executemany. Setiap batch adalah satu transaksi yang juga
+memperbarui laporan_rollup, sehingga file besar tidak menahan satu
+transaksi panjang. Baris yang tidak valid dilewati dan dicatat di laporan
+error (nomor baris, field, pesan).
+"""
+import csv
+import io
+import os
+from collections import Counter
+from datetime import datetime, date
+from wtforms.validators import DataRequired, Length
+
+IMPORT_FIELDS = ('unit', 'pelapor', 'modul_simrs', 'jenis_kesalahan',
+                 'deskripsi', 'tgl_kejadian', 'status')
+
+# Header yang dikenali: nama kolom model atau header file export
+HEADER_ALIASES = {
+    'unit': 'unit',
+    'pelapor': 'pelapor',
+    'modul simrs': 'modul_simrs',
+    'jenis kesalahan': 'jenis_kesalahan',
+    'deskripsi': 'deskripsi',
+    'tanggal kejadian': 'tgl_kejadian',
+    'status': 'status',
+}
+
+DATETIME_FORMATS = ('%Y-%m-%dT%H:%M', '%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M',
+                    '%Y-%m-%d', '%d/%m/%Y %H:%M', '%d/%m/%Y')
+
+
+class ImportFileError(ValueError):
+    """File import tidak bisa dibaca atau header wajib tidak ada"""
+
+
+def _field_rules():
+    """Aturan validasi per field, diambil dari definisi LaporanForm"""
+    from app.forms import LaporanForm, EditStatusForm
+
+    rules = {}
+    for name in ('unit', 'pelapor', 'modul_simrs', 'jenis_kesalahan', 'deskripsi', 'tgl_kejadian'):
+        kwargs = getattr(LaporanForm, name).kwargs
+        rule = {'required': None, 'max': None, 'choices': None}
+        for validator in kwargs.get('validators', []):
+            if isinstance(validator, DataRequired):
+                rule['required'] = validator.message
+            elif isinstance(validator, Length) and validator.max > 0:
+                rule['max'] = (validator.max, validator.message)
+        if 'choices' in kwargs:
+            rule['choices'] = {value for value, label in kwargs['choices']}
+        rules[name] = rule
+
+    # Status tidak ada di LaporanForm; nilai yang boleh mengikuti EditStatusForm
+    rules['status'] = {
+        'required': None,
+        'max': None,
+        'choices': {value for value, label in EditStatusForm.status.kwargs['choices']},
+    }
+    return rules
+
+
+def _normalize_header(header):
+    key = str(header or '').strip().lower().replace('_', ' ')
+    if key in HEADER_ALIASES:
+        return HEADER_ALIASES[key]
+    return HEADER_ALIASES.get(key.replace('tgl', 'tanggal'))
+
+
+def parse_datetime(value):
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    text = str(value).strip()
+    try:
+        # Jalur cepat untuk format ISO (termasuk hasil export aplikasi ini)
+        return datetime.fromisoformat(text)
+    except ValueError:
+        pass
+    for fmt in DATETIME_FORMATS:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    raise ValueError(text)
+
+
+def iter_import_rows(stream, filename):
+    """
+    Baca file CSV/XLSX baris demi baris.
+    Yields: (nomor_baris, dict field -> nilai mentah); nomor baris mengikuti
+    spreadsheet (header = baris 1)
+    Raises: ImportFileError jika format tidak didukung atau kolom wajib hilang
+    """
+    ext = os.path.splitext(filename or '')[1].lower()
+    if ext == '.csv':
+        text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+        rows = csv.reader(text)
+        workbook = None
+    elif ext == '.xlsx':
+        from openpyxl import load_workbook
+        try:
+            workbook = load_workbook(stream, read_only=True, data_only=True)
+        except Exception as e:
+            raise ImportFileError(f'File Excel tidak bisa dibaca: {e}')
+        rows = workbook.active.iter_rows(values_only=True)
+    else:
+        raise ImportFileError('Format file harus .csv atau .xlsx')
+
+    try:
+        header = next(rows, None)
+        if header is None:
+            raise ImportFileError('File kosong')
+        columns = [_normalize_header(name) for name in header]
+        missing = {'unit', 'pelapor', 'modul_simrs', 'jenis_kesalahan',
+                   'deskripsi', 'tgl_kejadian'} - set(columns)
+        if missing:
+            raise ImportFileError('Kolom wajib tidak ada: ' + ', '.join(sorted(missing)))
+
+        for row_number, values in enumerate(rows, 2):
+            if not any(value not in (None, '') for value in values):
+                continue
+            yield row_number, {
+                field: value for field, value in zip(columns, values) if field
+            }
+    finally:
+        if workbook is not None:
+            workbook.close()
+
+
+def validate_row(raw, rules):
+    """
+    Validasi satu baris import.
+    Returns: (values, errors); values dict siap insert atau None jika ada error,
+    errors list of (field, pesan)
+    """
+    from app.utils import sanitize_input
+
+    values = {}
+    errors = []
+    for field in IMPORT_FIELDS:
+        rule = rules[field]
+        value = raw.get(field)
+        if isinstance(value, str):
+            value = value.strip()
+        if value in (None, ''):
+            if rule['required']:
+                errors.append((field, rule['required']))
+            values[field] = None
+            continue
+
+        if field == 'tgl_kejadian':
+            try:
+                values[field] = parse_datetime(value)
+            except ValueError:
+                errors.append((field, 'Format tanggal tidak valid'))
+            continue
+
+        value = str(value)
+        if rule['choices'] is not None and value not in rule['choices']:
+            errors.append((field, f'Nilai tidak valid: {value}'))
+            continue
+        if rule['max'] and len(value) > rule['max'][0]:
+            errors.append((field, rule['max'][1]))
+            continue
+        values[field] = sanitize_input(value) if field in ('unit', 'pelapor', 'modul_simrs', 'deskripsi') else value
+
+    if errors:
+        return None, errors
+    # executemany butuh key yang sama di setiap baris, jadi default diisi di sini
+    values['status'] = values['status'] or 'pending'
+    return values, errors
+
+
+def _insert_batch(batch):
+    """Insert satu batch + delta rollup dalam satu transaksi"""
+    from sqlalchemy import insert
+    from app.models import db, Laporan
+    from app.rollup import apply_rollup_deltas, rollup_key
+    from app.versioning import bump_data_version
+
+    deltas = Counter(
+        rollup_key(row['tgl_kejadian'], row['status'], row['jenis_kesalahan'], row['unit'])
+        for row in batch
+    )
+    try:
+        db.session.execute(insert(Laporan.__table__), batch)
+        apply_rollup_deltas(db.session.connection(), deltas)
+        bump_data_version(db.session.connection())
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def import_laporan(rows, batch_size=1000, created_by=None, dry_run=False):
+    """
+    Validasi dan insert baris import per batch.
+    rows: iterable (nomor_baris, dict) dari iter_import_rows
+    Returns: dict total, inserted, errors (list of (nomor_baris, field, pesan))
+    """
+    from app.utils import invalidate_unit_choices
+
+    rules = _field_rules()
+    now = datetime.utcnow()
+    total = inserted = 0
+    errors = []
+    batch = []
+
+    for row_number, raw in rows:
+        total += 1
+        values, row_errors = validate_row(raw, rules)
+        if row_errors:
+            errors.extend((row_number, field, message) for field, message in row_errors)
+            continue
+
+        values.update(created_by=created_by, created_at=now, updated_at=now)
+        batch.append(values)
+        if len(batch) >= batch_size:
+            if not dry_run:
+                _insert_batch(batch)
+            inserted += len(batch)
+            batch = []
+
+    if batch:
+        if not dry_run:
+            _insert_batch(batch)
+        inserted += len(batch)
+
+    if inserted and not dry_run:
+        invalidate_unit_choices()
+    return {'total': total, 'inserted': inserted, 'errors': errors}
+
+
+def write_error_report(errors, output):
+    """Tulis laporan error import sebagai CSV (baris, field, pesan)"""
+    writer = csv.writer(output)
+    writer.writerow(['Baris', 'Field', 'Pesan'])
+    writer.writerows(errors)
@@ -0,0 +1,228 @@
+"""
+Export di background.
+
+Request /export?async=1 hanya mendaftarkan job lalu langsung kembali; file
+dibuat oleh pool worker (thread atau proses, lihat EXPORT_EXECUTOR) ke
+EXPORT_DIR. Status job disimpan sebagai file JSON di direktori yang sama
+supaya bisa dibaca oleh worker gunicorn mana pun yang menerima request
+polling/download. File yang lebih tua dari EXPORT_RETENTION dihapus.
+
+Selama job antre/berjalan, thread heartbeat di worker yang mendaftarkannya
+memperbarui mtime file status. Jika worker mati atau di-recycle di tengah
+job, heartbeat berhenti dan setelah EXPORT_HEARTBEAT_TIMEOUT job dilaporkan
+'failed' supaya polling dashboard berhenti.
+"""
+import json
+import multiprocessing
+import os
+import secrets
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from flask import current_app
+
+EXPORT_EXTENSIONS = {'csv': 'csv', 'excel': 'xlsx'}
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+_pending = 0
+_worker_app = None
+_active_jobs = set()
+_heartbeat_pid = None
+
+
+class ExportQueueFull(Exception):
+    """Terlalu banyak export yang sedang antre di proses ini"""
+
+
+def _job_path(export_dir, job_id, suffix='json'):
+    return os.path.join(export_dir, f'{job_id}.{suffix}')
+
+
+def _write_status(export_dir, job_id, **fields):
+    path = _job_path(export_dir, job_id)
+    try:
+        with open(path) as f:
+            status = json.load(f)
+    except (OSError, ValueError):
+        status = {'id': job_id}
+    status.update(fields)
+
+    fd, tmp_path = tempfile.mkstemp(dir=export_dir, suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(status, f)
+    os.replace(tmp_path, path)
+    return status
+
+
+def get_job(job_id):
+    """Returns: dict status job, atau None jika tidak ada/kedaluwarsa"""
+    if not job_id.replace('-', '').replace('_', '').isalnum():
+        return None
+    path = _job_path(current_app.config['EXPORT_DIR'], job_id)
+    try:
+        with open(path) as f:
+            job = json.load(f)
+        heartbeat = os.path.getmtime(path)
+    except (OSError, ValueError):
+        return None
+    # Heartbeat berhenti: worker yang memegang job sudah tidak ada
+    timeout = current_app.config.get('EXPORT_HEARTBEAT_TIMEOUT', 60)
+    if job.get('status') in ('queued', 'running') and time.time() - heartbeat > timeout:
+        job.update(status='failed', finished_at=heartbeat,
+                   error='Proses export berhenti sebelum selesai, silakan ulangi')
+    return job
+
+
+def get_job_file(job):
+    """Path file hasil export untuk job yang sudah selesai"""
+    return _job_path(current_app.config['EXPORT_DIR'], job['id'], EXPORT_EXTENSIONS[job['format']])
+
+
+def cleanup_expired_jobs(export_dir, retention):
+    """Hapus status dan file export yang lebih tua dari retention detik"""
+    cutoff = time.time() - retention
+    removed = 0
+    for name in os.listdir(export_dir):
+        path = os.path.join(export_dir, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+def run_export_job(app, job_id, params, export_format):
+    """Buat file export untuk satu job (dijalankan di pool worker)"""
+    from app.utils import build_search_query, export_search_results, write_excel_export
+
+    export_dir = app.config['EXPORT_DIR']
+    final_path = _job_path(export_dir, job_id, EXPORT_EXTENSIONS[export_format])
+    tmp_path = final_path + '.part'
+
+    with app.app_context():
+        _write_status(export_dir, job_id, status='running', started_at=time.time())
+        try:
+            query = build_search_query(params)
+            if export_format == 'csv':
+                with open(tmp_path, 'wb') as f:
+                    for chunk in export_search_results(query, 'csv'):
+                        f.write(chunk)
+            else:
+                write_excel_export(query, tmp_path)
+            os.replace(tmp_path, final_path)
+            _write_status(export_dir, job_id, status='done', finished_at=time.time(),
+                          size=os.path.getsize(final_path))
+        except Exception as e:
+            app.logger.error(f'Export job {job_id} error: {str(e)}')
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            _write_status(export_dir, job_id, status='failed', finished_at=time.time(),
+                          error='Terjadi kesalahan saat export data')
+        finally:
+            from app.models import db
+            db.session.remove()
+
+
+def _init_process_worker(config):
+    """Initializer proses pool: buat app sekali per proses"""
+    global _worker_app
+    from app import create_app
+    _worker_app = create_app(type('ExportWorkerConfig', (), config))
+
+
+def _run_in_process(job_id, params, export_format):
+    run_export_job(_worker_app, job_id, params, export_format)
+
+
+def _get_executor(app):
+    """Pool dibuat lazy per proses (aman setelah fork gunicorn)"""
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            workers = app.config.get('EXPORT_WORKERS', 1)
+            if app.config.get('EXPORT_EXECUTOR', 'thread') == 'process':
+                config = {key: value for key, value in app.config.items() if key.isupper()}
+                _executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_process_worker,
+                    initargs=(config,)
+                )
+            else:
+                _executor = ThreadPoolExecutor(max_workers=workers,
+                                               thread_name_prefix='export')
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def _heartbeat_loop(export_dir, interval):
+    while True:
+        time.sleep(interval)
+        with _executor_lock:
+            job_ids = list(_active_jobs)
+        now = time.time()
+        for job_id in job_ids:
+            try:
+                os.utime(_job_path(export_dir, job_id), (now, now))
+            except OSError:
+                pass
+
+
+def _ensure_heartbeat(app):
+    """Thread heartbeat dibuat lazy per proses (dipanggil dengan _executor_lock)"""
+    global _heartbeat_pid
+    if _heartbeat_pid != os.getpid():
+        thread = threading.Thread(target=_heartbeat_loop, name='export-heartbeat', daemon=True,
+                                  args=(app.config['EXPORT_DIR'],
+                                        app.config.get('EXPORT_HEARTBEAT_INTERVAL', 10)))
+        thread.start()
+        _heartbeat_pid = os.getpid()
+
+
+def _job_finished(job_id):
+    global _pending
+    with _executor_lock:
+        _pending -= 1
+        _active_jobs.discard(job_id)
+
+
+def enqueue_export(params, export_format):
+    """
+    Daftarkan job export baru.
+    params: parameter build_search_query (dict)
+    Returns: dict status job
+    Raises: ExportQueueFull jika antrean proses ini sudah penuh
+    """
+    global _pending
+    app = current_app._get_current_object()
+    export_dir = app.config['EXPORT_DIR']
+    os.makedirs(export_dir, exist_ok=True)
+    cleanup_expired_jobs(export_dir, app.config.get('EXPORT_RETENTION', 3600))
+
+    with _executor_lock:
+        if _pending >= app.config.get('EXPORT_MAX_PENDING', 4):
+            raise ExportQueueFull()
+        _pending += 1
+
+    job_id = secrets.token_urlsafe(16)
+    status = _write_status(export_dir, job_id, status='queued', format=export_format,
+                           params=params, created_at=time.time())
+    with _executor_lock:
+        _active_jobs.add(job_id)
+        _ensure_heartbeat(app)
+    try:
+        executor = _get_executor(app)
+        if isinstance(executor, ProcessPoolExecutor):
+            future = executor.submit(_run_in_process, job_id, params, export_format)
+        else:
+            future = executor.submit(run_export_job, app, job_id, params, export_format)
+    except Exception:
+        _job_finished(job_id)
+        raise
+    future.add_done_callback(lambda future: _job_finished(job_id))
+    return status
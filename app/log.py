@@ -0,0 +1,227 @@
+"""
+Logging aplikasi non-blocking dengan output JSON per baris.
+
+Thread request hanya memasukkan record ke queue (QueueHandler); penulisan
+ke file (RotatingFileHandler, ukuran LOG_MAX_BYTES dan LOG_BACKUP_COUNT
+file lama) dan/atau stdout dilakukan thread listener di background. Queue
+dibatasi LOG_QUEUE_SIZE: jika penuh, record dibuang dan dihitung, bukan
+menunggu. Queue, listener dan handler dibuat per proses (aman setelah fork
+gunicorn).
+
+Rotasi ukuran hanya aman jika satu proses yang menulis file: di bawah
+gunicorn LOG_FILE harus memuat ``{pid}`` (file per worker) atau memakai
+LOG_ROTATION=external (WatchedFileHandler + logrotate); selain itu log
+dialihkan ke stdout.
+
+Setiap record membawa request_id (header X-Request-ID atau dibuat baru,
+dikirim balik di response), route dan method; satu baris log per request
+dengan status dan duration_ms dicatat jika LOG_REQUESTS aktif.
+"""
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import re
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, WatchedFileHandler
+from flask import g, has_request_context, request
+
+_REQUEST_ID = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+# Atribut bawaan LogRecord; atribut lain (dari extra=...) ikut ditulis ke JSON
+_RESERVED = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """Satu objek JSON per baris"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'source': f'{record.pathname}:{record.lineno}',
+            'pid': record.process,
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc_info'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class RequestContextFilter(logging.Filter):
+    """Tambahkan request_id/route/method; jalan di thread request sebelum masuk queue"""
+
+    def filter(self, record):
+        if has_request_context():
+            record.request_id = g.get('request_id')
+            record.route = request.endpoint
+            record.method = request.method
+            record.path = request.path
+        return True
+
+
+class LogPipeline:
+    """Queue + listener per proses; handler_factory() membuat handler tujuan per proses"""
+
+    def __init__(self, handler_factory, queue_size=10000):
+        self.handler_factory = handler_factory
+        self.handlers = []
+        self.queue_size = queue_size
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._listener = None
+
+    def get_queue(self):
+        """Queue proses ini; listener dibuat lazy (setelah fork tidak ada thread warisan)"""
+        pid = os.getpid()
+        if self._pid != pid:
+            with self._lock:
+                if self._pid != pid:
+                    # Handler warisan master (file descriptor yang sama) tidak dipakai
+                    self.handlers = self.handler_factory()
+                    self._queue = queue.Queue(self.queue_size)
+                    self._listener = QueueListener(self._queue, *self.handlers, respect_handler_level=True)
+                    self._listener.start()
+                    self._pid = pid
+                    atexit.register(self.stop)
+        return self._queue
+
+    def record_drop(self):
+        """Hitung record yang dibuang; dipanggil bersamaan dari banyak thread request"""
+        with self._lock:
+            self.dropped += 1
+
+    def stop(self):
+        """Tulis sisa record di queue lalu hentikan listener"""
+        if self._listener is not None and self._pid == os.getpid():
+            self._listener.stop()
+            for handler in self.handlers:
+                handler.close()
+            self._listener = None
+            self._pid = None
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler yang tidak pernah menunggu: record dibuang jika queue penuh"""
+
+    def __init__(self, pipeline):
+        super().__init__(None)
+        self.pipeline = pipeline
+
+    def prepare(self, record):
+        # Pesan dan traceback dirender di thread pemanggil; JSON dibuat listener
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.pipeline.get_queue().put_nowait(record)
+        except queue.Full:
+            self.pipeline.record_drop()
+
+
+def _start_request():
+    request_id = request.headers.get('X-Request-ID', '')
+    g.request_id = request_id if _REQUEST_ID.match(request_id) else uuid.uuid4().hex
+    g.log_started = time.perf_counter()
+
+
+def _finish_request(response):
+    response.headers['X-Request-ID'] = g.get('request_id', '')
+    started = g.pop('log_started', None)
+    if started is not None and request.endpoint != 'metrics':
+        from flask import current_app
+        if current_app.config.get('LOG_REQUESTS', True):
+            current_app.logger.info(
+                f'{request.method} {request.path} {response.status_code}',
+                extra={'status': response.status_code,
+                       'duration_ms': round((time.perf_counter() - started) * 1000, 2)}
+            )
+    return response
+
+
+def _under_gunicorn():
+    # Diset arbiter gunicorn sebelum app dimuat (juga dengan preload)
+    return os.environ.get('SERVER_SOFTWARE', '').startswith('gunicorn')
+
+
+def _build_handlers(config, log_file, stdout):
+    formatter = JsonFormatter()
+    handlers = []
+    if log_file:
+        path = log_file.replace('{pid}', str(os.getpid()))
+        log_dir = os.path.dirname(path)
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+        if config.get('LOG_ROTATION', 'size') == 'external':
+            # logrotate memindahkan file; setiap proses membuka ulang file baru
+            file_handler = WatchedFileHandler(path, encoding='utf-8', delay=True)
+        else:
+            file_handler = RotatingFileHandler(path,
+                                               maxBytes=config.get('LOG_MAX_BYTES', 10 * 1024 * 1024),
+                                               backupCount=config.get('LOG_BACKUP_COUNT', 10),
+                                               encoding='utf-8', delay=True)
+        file_handler.setFormatter(formatter)
+        handlers.append(file_handler)
+    if stdout:
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(formatter)
+        handlers.append(stream_handler)
+    return handlers
+
+
+def init_logging(app):
+    """Pasang request id dan, di luar debug/testing, pipeline log JSON non-blocking"""
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+
+    if app.debug or app.testing:
+        return None
+
+    config = app.config
+    log_file = config.get('LOG_FILE')
+    stdout = config.get('LOG_STDOUT', False)
+    shared_rotation = log_file and config.get('LOG_ROTATION', 'size') == 'size' and '{pid}' not in log_file
+    if shared_rotation and _under_gunicorn():
+        # RotatingFileHandler tiap worker pada file yang sama saling menimpa saat rotasi
+        log_file, stdout, fallback = None, True, config['LOG_FILE']
+    else:
+        fallback = None
+    if not log_file and not stdout:
+        return None
+
+    pipeline = LogPipeline(lambda: _build_handlers(config, log_file, stdout),
+                           queue_size=config.get('LOG_QUEUE_SIZE', 10000))
+    queue_handler = NonBlockingQueueHandler(pipeline)
+    queue_handler.addFilter(RequestContextFilter())
+
+    level = logging.getLevelName(config.get('LOG_LEVEL', 'INFO'))
+    app.logger.addHandler(queue_handler)
+    app.logger.setLevel(level)
+    # Handler stderr bawaan Flask menulis secara sinkron di thread request
+    from flask.logging import default_handler
+    app.logger.removeHandler(default_handler)
+    app.extensions['log_pipeline'] = pipeline
+    if fallback:
+        app.logger.warning(f'LOG_FILE {fallback} tidak dipakai di bawah gunicorn: rotasi per worker '
+                           'saling menimpa. Log ditulis ke stdout; pakai {pid} di LOG_FILE '
+                           'atau LOG_ROTATION=external')
+    return pipeline
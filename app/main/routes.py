@@ -1,11 +1,18 @@
-from flask import render_template, request, redirect, url_for, flash, current_app, Response
+from flask import render_template, request, redirect, url_for, flash, current_app, Response, stream_with_context, send_file, jsonify
 from flask_login import login_required, current_user
-from sqlalchemy import distinct, func
 from datetime import datetime
+import tempfile
 from app import db
 from app.models import Laporan, SearchPreference
-from app.forms import SearchForm, SaveSearchForm
-from app.utils import build_search_query, export_search_results, get_search_statistics, format_datetime
+from app.forms import SearchForm, SaveSearchForm, BulkUpdateForm
+from app.utils import (build_search_query, project_search_rows, export_search_results, write_excel_export,
+                       get_search_statistics, get_unit_choices, format_datetime, LISTING_ROW_COLUMNS)
+from app.pagination import KeysetPagination, KEYSET_SORT_COLUMNS
+from app.rollup import get_rollup_statistics
+from app.thumbnails import evidence_url, is_image
+from app.page_cache import cached_page, DEFAULT_VERSIONS
+from app.versioning import EVIDENCE_VERSION
+from app.jobs import enqueue_export, get_job, get_job_file, ExportQueueFull, EXPORT_EXTENSIONS
 from . import bp
 
 # ======================
@@ -13,14 +20,15 @@ from . import bp
 # ======================
 @bp.route("/dashboard")
 # @login_required  # DISABLED for development
+# Link thumbnail berubah saat derivative selesai dibuat setelah laporan disimpan
+@cached_page(csrf=True, versions=DEFAULT_VERSIONS + (EVIDENCE_VERSION,))
 def dashboard():
     try:
         # Get search parameters
         search_form = SearchForm()
         
-        # Populate unit choices dynamically
-        units = db.session.query(distinct(Laporan.unit)).filter(Laporan.unit.isnot(None)).all()
-        search_form.unit_filter.choices = [('', 'Semua Unit')] + [(unit[0], unit[0]) for unit in units]
+        # Populate unit choices from cached facet list
+        search_form.unit_filter.choices = get_unit_choices()
         
         # Build query based on search criteria
         if request.args:
@@ -52,16 +60,34 @@ def dashboard():
             # Default query - sort by ID ascending for sequential order
             query = Laporan.query.order_by(Laporan.id.asc())
         
-        # Pagination
-        page = request.args.get('page', 1, type=int)
-        per_page = 10
+        # Get search statistics (total juga dipakai oleh pagination)
+        search_stats = get_search_statistics(query)
         
-        laporan = query.paginate(
-            page=page, per_page=per_page, error_out=False
-        )
+        # Daftar hanya butuh beberapa kolom, tidak perlu hydrate objek Laporan
+        rows = project_search_rows(query, LISTING_ROW_COLUMNS, with_users=False)
         
-        # Get search statistics
-        search_stats = get_search_statistics(query)
+        # Pagination
+        per_page = current_app.config.get('DASHBOARD_PER_PAGE', 10)
+        sort_by = request.args.get('sort_by', 'id')
+        pagination_mode = current_app.config.get('DASHBOARD_PAGINATION', 'offset')
+        if sort_by not in KEYSET_SORT_COLUMNS:
+            # Urutan relevansi tidak punya kolom seek, pakai offset
+            pagination_mode = 'offset'
+        
+        if pagination_mode == 'keyset':
+            laporan = KeysetPagination(
+                rows, Laporan,
+                sort_by=sort_by,
+                sort_order=request.args.get('sort_order', 'asc'),
+                cursor=request.args.get('cursor'),
+                per_page=per_page,
+                total=search_stats['total']
+            )
+        else:
+            page = request.args.get('page', 1, type=int)
+            laporan = rows.paginate(
+                page=page, per_page=per_page, error_out=False
+            )
         
         # Get user's saved searches
         saved_searches = []
@@ -74,9 +100,20 @@ def dashboard():
             args = request.args.copy()
             args['page'] = page
             return url_for('main.dashboard', **args)
+        
+        def url_for_cursor(cursor):
+            args = request.args.copy()
+            args.pop('page', None)
+            args['cursor'] = cursor
+            return url_for('main.dashboard', **args)
             
         return render_template("dashboard_modern.html", 
                              laporan=laporan, 
+                             bulk_form=BulkUpdateForm(),
+                             pagination_mode=pagination_mode,
+                             evidence_url=evidence_url,
+                             is_image=is_image,
+                             url_for_cursor=url_for_cursor,
                              format_datetime=format_datetime,
                              search_form=search_form,
                              search_stats=search_stats,
@@ -106,9 +143,8 @@ def dashboard():
 def search():
     form = SearchForm()
     
-    # Populate unit choices dynamically
-    units = db.session.query(distinct(Laporan.unit)).filter(Laporan.unit.isnot(None)).all()
-    form.unit_filter.choices = [('', 'Semua Unit')] + [(unit[0], unit[0]) for unit in units]
+    # Populate unit choices from cached facet list
+    form.unit_filter.choices = get_unit_choices()
     
     if form.validate_on_submit():
         # Build query parameters
@@ -142,83 +178,55 @@ def search():
 def export_results():
     """Export laporan to CSV or Excel"""
     try:
-        # Build query based on current search parameters
-        query = build_search_query(request.args)
-        laporan_list = query.all()
-        
         # Export format
         export_format = request.args.get('format', 'csv')
         
+        # Export besar bisa dijalankan di background lalu diunduh setelah selesai
+        if request.args.get('async') and export_format in EXPORT_EXTENSIONS:
+            params = request.args.to_dict()
+            params.pop('async', None)
+            params.pop('format', None)
+            try:
+                job = enqueue_export(params, export_format)
+            except ExportQueueFull:
+                return jsonify({'error': 'Antrean export penuh, coba lagi nanti'}), 429
+            
+            status_url = url_for('main.export_job_status', job_id=job['id'])
+            return jsonify({'id': job['id'], 'status': job['status'], 'status_url': status_url}), \
+                202, {'Location': status_url}
+        
+        # Build query based on current search parameters
+        query = build_search_query(request.args)
+        
         if export_format == 'csv':
-            csv_data = export_search_results(laporan_list, 'csv')
+            csv_chunks = export_search_results(query, 'csv')
             
             filename = f"laporan_simrs_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
             
+            # Streaming response: baris dikirim sambil dibaca dari database
             return Response(
-                csv_data,
+                stream_with_context(csv_chunks),
                 mimetype='text/csv',
                 headers={'Content-Disposition': f'attachment; filename={filename}'}
             )
         elif export_format == 'excel':
-            # Excel export
-            import io
-            from openpyxl import Workbook
-            from openpyxl.styles import Font, PatternFill, Alignment
-            
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Laporan SIMRS"
-            
-            # Header styling
-            header_fill = PatternFill(start_color="4F46E5", end_color="4F46E5", fill_type="solid")
-            header_font = Font(bold=True, color="FFFFFF")
-            
-            # Headers
-            headers = ['ID', 'Unit', 'Pelapor', 'Modul SIMRS', 'Jenis Kesalahan', 
-                      'Deskripsi', 'Tanggal Kejadian', 'Status', 'Tanggal Dibuat']
-            
-            for col, header in enumerate(headers, 1):
-                cell = ws.cell(row=1, column=col, value=header)
-                cell.fill = header_fill
-                cell.font = header_font
-                cell.alignment = Alignment(horizontal='center')
-            
-            # Data rows
-            for row_idx, laporan in enumerate(laporan_list, 2):
-                ws.cell(row=row_idx, column=1, value=laporan.id)
-                ws.cell(row=row_idx, column=2, value=laporan.unit)
-                ws.cell(row=row_idx, column=3, value=laporan.pelapor)
-                ws.cell(row=row_idx, column=4, value=laporan.modul_simrs or '')
-                ws.cell(row=row_idx, column=5, value=laporan.jenis_kesalahan)
-                ws.cell(row=row_idx, column=6, value=laporan.deskripsi)
-                ws.cell(row=row_idx, column=7, value=laporan.tgl_kejadian.strftime('%Y-%m-%d %H:%M') if laporan.tgl_kejadian else '')
-                ws.cell(row=row_idx, column=8, value=laporan.status)
-                ws.cell(row=row_idx, column=9, value=laporan.created_at.strftime('%Y-%m-%d %H:%M') if laporan.created_at else '')
-            
-            # Auto-adjust column widths
-            for column in ws.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(cell.value)
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                ws.column_dimensions[column_letter].width = adjusted_width
-            
-            # Save to bytes
-            output = io.BytesIO()
-            wb.save(output)
+            # Workbook write-only di-spool ke file sementara lalu di-stream;
+            # file sementara terhapus otomatis saat response ditutup
+            output = tempfile.TemporaryFile()
+            try:
+                write_excel_export(query, output)
+            except Exception:
+                output.close()
+                raise
             output.seek(0)
             
             filename = f"laporan_simrs_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
             
-            return Response(
-                output.getvalue(),
+            return send_file(
+                output,
                 mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                headers={'Content-Disposition': f'attachment; filename={filename}'}
+                as_attachment=True,
+                download_name=filename
             )
         
         flash('Format export tidak didukung', 'error')
@@ -229,6 +237,37 @@ def export_results():
         flash('Terjadi kesalahan saat export data', 'error')
         return redirect(url_for('main.dashboard'))
 
+@bp.route("/export/jobs/<job_id>")
+# @login_required  # DISABLED for development
+def export_job_status(job_id):
+    """Status job export background (JSON)"""
+    job = get_job(job_id)
+    if not job:
+        return jsonify({'error': 'Job export tidak ditemukan'}), 404
+    
+    response = {key: job.get(key) for key in ('id', 'status', 'format', 'created_at', 'finished_at', 'size', 'error')}
+    if job['status'] == 'done':
+        response['download_url'] = url_for('main.export_job_download', job_id=job_id)
+    return jsonify(response)
+
+@bp.route("/export/jobs/<job_id>/download")
+# @login_required  # DISABLED for development
+def export_job_download(job_id):
+    """Unduh hasil job export background yang sudah selesai"""
+    job = get_job(job_id)
+    if not job:
+        return jsonify({'error': 'Job export tidak ditemukan'}), 404
+    if job['status'] != 'done':
+        return jsonify({'error': 'Job export belum selesai', 'status': job['status']}), 409
+    
+    created = datetime.fromtimestamp(job['created_at']).strftime('%Y%m%d_%H%M%S')
+    extension = EXPORT_EXTENSIONS[job['format']]
+    return send_file(
+        get_job_file(job),
+        as_attachment=True,
+        download_name=f"laporan_simrs_{created}.{extension}"
+    )
+
 @bp.route("/save_search", methods=["POST"])
 # @login_required  # DISABLED for development
 def save_search():
@@ -351,22 +390,23 @@ def delete_search(search_id):
 
 @bp.route("/statistik")
 # @login_required  # DISABLED for development
+@cached_page()
 def statistik():
     try:
-        # Get statistics data
-        total_laporan = Laporan.query.count()
-        pending_count = Laporan.query.filter_by(status='pending').count()
-        in_progress_count = Laporan.query.filter_by(status='in_progress').count()
-        resolved_count = Laporan.query.filter_by(status='resolved').count()
+        # Get statistics data from the pre-aggregated rollup table
+        rollup = get_rollup_statistics()
+        total_laporan = rollup['total']
+        pending_count = rollup['status_stats'].get('pending', 0)
+        in_progress_count = rollup['status_stats'].get('in_progress', 0)
+        resolved_count = rollup['status_stats'].get('resolved', 0)
         
         # Get laporan by jenis kesalahan
-        jenis_stats = db.session.query(
-            Laporan.jenis_kesalahan, 
-            func.count(Laporan.id).label('count')
-        ).group_by(Laporan.jenis_kesalahan).all()
+        jenis_stats = rollup['jenis_stats']
         
         # Get recent activity (last 10 reports ordered by ID ascending)
-        recent_reports = Laporan.query.order_by(Laporan.id.asc()).limit(10).all()
+        recent_reports = project_search_rows(
+            Laporan.query.order_by(Laporan.id.asc()), LISTING_ROW_COLUMNS, with_users=False
+        ).limit(10).all()
         
         stats_data = {
             'total_laporan': total_laporan,
@@ -0,0 +1,448 @@
+"""
+Instrumentasi request dan SQL dengan endpoint /metrics (format teks Prometheus).
+
+Per request dicatat latency (histogram per endpoint), jumlah statement SQL
+dan total waktu database (event before/after_cursor_execute engine).
+Statement yang lebih lama dari SLOW_QUERY_MS ditulis ke log dengan SQL yang
+dinormalisasi. Setiap proses menyimpan counter di memori; thread background
+menulis snapshot-nya ke METRICS_DIR (file JSON per proses, atomik) setiap
+METRICS_FLUSH_INTERVAL detik jika ada perubahan, jadi request tidak
+melakukan I/O untuk metrics. /metrics menjumlahkan semua
+snapshot sehingga hasilnya benar untuk semua worker gunicorn. Nilai yang
+dihitung di tempat lain per proses (hit cache user, log yang dibuang) dibaca
+oleh collector di loop flush setiap proses.
+
+Snapshot worker yang sudah berhenti (di-recycle) digabung ke satu file
+arsip supaya counter tidak turun dan jumlah file tetap kecil. Direktori
+dikosongkan saat master gunicorn start, atau saat app dibuat tanpa ada
+proses lain yang masih hidup (run tanpa gunicorn).
+"""
+import atexit
+import glob
+try:
+    import fcntl
+except ImportError:  # Windows: snapshot worker mati tidak diarsipkan
+    fcntl = None
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from flask import Response, abort, current_app, g, has_request_context, request
+from sqlalchemy import event
+
+# Batas bucket histogram (detik / jumlah statement)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+
+METRIC_HELP = {
+    'bap_http_requests_total': ('counter', 'Jumlah request HTTP per endpoint, method dan status'),
+    'bap_http_request_duration_seconds': ('histogram', 'Latency request HTTP per endpoint'),
+    'bap_db_statements_total': ('counter', 'Jumlah statement SQL per endpoint'),
+    'bap_db_duration_seconds_total': ('counter', 'Total waktu eksekusi SQL per endpoint'),
+    'bap_db_statements_per_request': ('histogram', 'Jumlah statement SQL per request'),
+    'bap_db_slow_queries_total': ('counter', 'Statement SQL di atas SLOW_QUERY_MS per endpoint'),
+    'bap_user_cache_hits_total': ('counter', 'Hit cache user_loader'),
+    'bap_user_cache_misses_total': ('counter', 'Miss cache user_loader'),
+    'bap_log_records_dropped_total': ('counter', 'Record log yang dibuang karena queue log penuh'),
+}
+
+_SNAPSHOT_PREFIX = 'metrics_'
+_ARCHIVE_NAME = f'{_SNAPSHOT_PREFIX}archive.json'
+_IN_LIST = re.compile(r'\(\s*(?:\?|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|:\w+))+\s*\)')
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_SPACES = re.compile(r'\s+')
+
+
+def normalize_sql(statement):
+    """SQL untuk log: literal jadi ?, daftar IN (...) diringkas, spasi dirapikan"""
+    statement = _STRING.sub('?', statement)
+    statement = _NUMBER.sub('?', statement)
+    statement = _IN_LIST.sub('(?, ...)', statement)
+    return _SPACES.sub(' ', statement).strip()
+
+
+def _labels_key(labels):
+    return json.dumps(sorted(labels.items()))
+
+
+class MetricsRegistry:
+    """Counter dan histogram per proses, thread-safe, dengan snapshot ke file"""
+
+    def __init__(self, directory, flush_interval=1.0, logger=None):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.logger = logger or logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._collectors = []
+        self._pid = None
+        self._reset()
+
+    def add_collector(self, collector):
+        """collector(): iterable (name, labels, value) counter milik proses ini, dibaca saat flush"""
+        self._collectors.append(collector)
+
+    def _reset(self):
+        # Dipanggil juga setelah fork: worker mulai dari nol dengan file sendiri
+        self._pid = os.getpid()
+        self._path = os.path.join(self.directory, f'{_SNAPSHOT_PREFIX}{self._pid}_{uuid.uuid4().hex[:8]}.json')
+        self._counters = {}
+        self._histograms = {}
+        self._dirty = False
+        self._flusher_pid = None
+
+    def _touch(self):
+        """Tandai ada perubahan; thread flusher dibuat lazy per proses (setelah fork)"""
+        if self._pid != os.getpid():
+            self._reset()
+        self._dirty = True
+        if self._flusher_pid != self._pid:
+            self._flusher_pid = self._pid
+            threading.Thread(target=self._flush_loop, name='metrics-flush', daemon=True).start()
+            atexit.register(self._flush_quietly)
+
+    def _flush_loop(self):
+        pid = os.getpid()
+        while self._pid == pid:
+            time.sleep(self.flush_interval)
+            self._run_collectors()
+            if self._dirty:
+                self._flush_quietly()
+
+    def _run_collectors(self):
+        """Salin nilai collector ke counter; snapshot ditandai berubah jika ada yang beda"""
+        for collector in self._collectors:
+            try:
+                values = list(collector())
+            except Exception as e:
+                self.logger.warning(f'Metrics collector error: {str(e)}')
+                continue
+            with self._lock:
+                if self._pid != os.getpid():
+                    return
+                for name, labels, value in values:
+                    series = self._counters.setdefault(name, {})
+                    key = _labels_key(labels)
+                    if series.get(key) != value:
+                        series[key] = value
+                        self._dirty = True
+
+    def _flush_quietly(self):
+        try:
+            self.flush()
+        except OSError as e:
+            # Metrics tidak boleh menggagalkan worker; coba lagi di interval berikutnya
+            self._dirty = True
+            self.logger.warning(f'Metrics snapshot tidak bisa ditulis: {str(e)}')
+
+    def inc(self, name, labels, value=1):
+        with self._lock:
+            self._touch()
+            series = self._counters.setdefault(name, {})
+            key = _labels_key(labels)
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name, labels, value, buckets):
+        with self._lock:
+            self._touch()
+            series = self._histograms.setdefault(name, {})
+            key = _labels_key(labels)
+            item = series.get(key)
+            if item is None:
+                item = series[key] = {'le': list(buckets), 'buckets': [0] * len(buckets),
+                                      'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(item['le']):
+                if value <= bound:
+                    item['buckets'][i] += 1
+                    break
+            item['sum'] += value
+            item['count'] += 1
+
+    def flush(self):
+        """Tulis snapshot proses ini secara atomik"""
+        self._run_collectors()
+        with self._lock:
+            if self._pid != os.getpid():
+                return
+            self._dirty = False
+            payload = json.dumps({'counters': self._counters, 'histograms': self._histograms})
+            path = self._path
+
+        _write_json(self.directory, path, payload)
+
+    def collect(self):
+        """Gabungkan snapshot semua proses. Returns: (counters, histograms)"""
+        archive_dead_snapshots(self.directory)
+        counters, histograms = {}, {}
+        for path in glob.glob(os.path.join(self.directory, f'{_SNAPSHOT_PREFIX}*.json')):
+            snapshot = _read_json(path)
+            if snapshot is not None:
+                _merge_snapshot(counters, histograms, snapshot)
+        return counters, histograms
+
+
+def _write_json(directory, path, payload):
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _merge_snapshot(counters, histograms, snapshot):
+    for name, series in snapshot.get('counters', {}).items():
+        merged = counters.setdefault(name, {})
+        for key, value in series.items():
+            merged[key] = merged.get(key, 0) + value
+    for name, series in snapshot.get('histograms', {}).items():
+        merged = histograms.setdefault(name, {})
+        for key, item in series.items():
+            target = merged.get(key)
+            if target is None:
+                merged[key] = {'le': item['le'], 'buckets': list(item['buckets']),
+                               'sum': item['sum'], 'count': item['count']}
+                continue
+            target['buckets'] = [a + b for a, b in zip(target['buckets'], item['buckets'])]
+            target['sum'] += item['sum']
+            target['count'] += item['count']
+
+
+def _snapshot_pids(directory):
+    """Returns: dict path snapshot proses -> pid (tanpa file arsip)"""
+    pids = {}
+    for path in glob.glob(os.path.join(directory, f'{_SNAPSHOT_PREFIX}*.json')):
+        pid = os.path.basename(path)[len(_SNAPSHOT_PREFIX):].split('_', 1)[0]
+        if pid.isdigit():
+            pids[path] = int(pid)
+    return pids
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def archive_dead_snapshots(directory):
+    """Gabungkan snapshot proses yang sudah mati ke file arsip lalu hapus snapshot-nya"""
+    if fcntl is None:
+        return 0
+    dead = [path for path, pid in _snapshot_pids(directory).items() if not _pid_alive(pid)]
+    if not dead:
+        return 0
+
+    os.makedirs(directory, exist_ok=True)
+    # Satu proses saja yang mengarsipkan; yang lain melihat file yang sudah dihapus
+    with open(os.path.join(directory, '.archive.lock'), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        archive_path = os.path.join(directory, _ARCHIVE_NAME)
+        archive = _read_json(archive_path) or {}
+        counters, histograms = archive.get('counters', {}), archive.get('histograms', {})
+        merged = []
+        for path in dead:
+            snapshot = _read_json(path)
+            if snapshot is not None:
+                _merge_snapshot(counters, histograms, snapshot)
+                merged.append(path)
+        if merged:
+            _write_json(directory, archive_path, json.dumps({'counters': counters, 'histograms': histograms}))
+            for path in merged:
+                os.remove(path)
+    return len(merged)
+
+
+def clear_metrics_dir(directory):
+    """Hapus snapshot lama (dipanggil saat master gunicorn start)"""
+    for path in glob.glob(os.path.join(directory, f'{_SNAPSHOT_PREFIX}*.json')):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def clear_metrics_dir_if_idle(directory):
+    """
+    Kosongkan snapshot run sebelumnya jika tidak ada proses lain yang masih
+    hidup (app dijalankan tanpa gunicorn, atau semua worker baru start).
+    """
+    pids = _snapshot_pids(directory).values()
+    if not any(pid != os.getpid() and _pid_alive(pid) for pid in pids):
+        clear_metrics_dir(directory)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(key, extra=None):
+    pairs = [(name, value) for name, value in json.loads(key)]
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_prometheus(counters, histograms):
+    """Format teks Prometheus (exposition format 0.0.4)"""
+    lines = []
+    for name in sorted(set(counters) | set(histograms)):
+        metric_type, help_text = METRIC_HELP.get(name, ('counter' if name in counters else 'histogram', name))
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {metric_type}')
+        for key, value in sorted(counters.get(name, {}).items()):
+            lines.append(f'{name}{_format_labels(key)} {_format_number(value)}')
+        for key, item in sorted(histograms.get(name, {}).items()):
+            cumulative = 0
+            for bound, count in zip(item['le'], item['buckets']):
+                cumulative += count
+                lines.append(f'{name}_bucket{_format_labels(key, ("le", _format_number(bound)))} {cumulative}')
+            lines.append(f'{name}_bucket{_format_labels(key, ("le", "+Inf"))} {item["count"]}')
+            lines.append(f'{name}_sum{_format_labels(key)} {_format_number(item["sum"])}')
+            lines.append(f'{name}_count{_format_labels(key)} {item["count"]}')
+    return '\n'.join(lines) + '\n'
+
+
+def get_metrics():
+    return current_app.extensions.get('metrics')
+
+
+def _endpoint():
+    # Endpoint (bukan path) supaya jumlah label tetap terbatas; 404 = 'unmatched'
+    return request.endpoint or 'unmatched'
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info['metrics_query_start'] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop('metrics_query_start', None)
+    if started is None or not has_request_context() or 'metrics_sql' not in g:
+        return
+    elapsed = time.perf_counter() - started
+    stats = g.metrics_sql
+    stats['count'] += 1
+    stats['seconds'] += elapsed
+
+    threshold = current_app.config.get('SLOW_QUERY_MS', 500)
+    if threshold and elapsed * 1000 >= threshold:
+        stats['slow'] += 1
+        current_app.logger.warning(
+            f'Slow query {elapsed * 1000:.1f} ms [{_endpoint()}]: {normalize_sql(statement)}',
+            extra={'sql_ms': round(elapsed * 1000, 1)}
+        )
+
+
+def _start_request():
+    g.metrics_started = time.perf_counter()
+    g.metrics_sql = {'count': 0, 'seconds': 0.0, 'slow': 0}
+
+
+def _record_request(status):
+    registry = get_metrics()
+    if registry is None or 'metrics_started' not in g:
+        return
+    elapsed = time.perf_counter() - g.pop('metrics_started')
+    sql = g.pop('metrics_sql')
+    endpoint = _endpoint()
+
+    registry.inc('bap_http_requests_total',
+                 {'endpoint': endpoint, 'method': request.method, 'status': str(status)})
+    registry.observe('bap_http_request_duration_seconds', {'endpoint': endpoint}, elapsed, LATENCY_BUCKETS)
+    registry.observe('bap_db_statements_per_request', {'endpoint': endpoint}, sql['count'], STATEMENT_BUCKETS)
+    if sql['count']:
+        registry.inc('bap_db_statements_total', {'endpoint': endpoint}, sql['count'])
+        registry.inc('bap_db_duration_seconds_total', {'endpoint': endpoint}, sql['seconds'])
+    if sql['slow']:
+        registry.inc('bap_db_slow_queries_total', {'endpoint': endpoint}, sql['slow'])
+
+
+def _after_request(response):
+    # Untuk response streaming (export CSV) yang diukur adalah waktu sampai view selesai
+    _record_request(response.status_code)
+    return response
+
+
+def _teardown_request(exc):
+    # after_request tidak dipanggil jika view melempar exception
+    if exc is not None:
+        _record_request(500)
+
+
+def _process_totals(app):
+    """Counter per proses yang dihitung di luar registry"""
+    user_cache = app.extensions.get('user_cache')
+    if user_cache is not None:
+        yield 'bap_user_cache_hits_total', {}, user_cache.hits
+        yield 'bap_user_cache_misses_total', {}, user_cache.misses
+    log_pipeline = app.extensions.get('log_pipeline')
+    if log_pipeline is not None:
+        yield 'bap_log_records_dropped_total', {}, log_pipeline.dropped
+
+
+def metrics_view():
+    token = current_app.config.get('METRICS_TOKEN')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        abort(401)
+
+    registry = get_metrics()
+    registry.flush()
+
+    counters, histograms = registry.collect()
+    return Response(render_prometheus(counters, histograms),
+                    content_type='text/plain; version=0.0.4; charset=utf-8',
+                    headers={'Cache-Control': 'no-store'})
+
+
+def init_metrics(app, db):
+    """Pasang hook request, event engine dan route /metrics (panggil setelah init_engine)"""
+    if not app.config.get('METRICS_ENABLED', True):
+        return None
+
+    clear_metrics_dir_if_idle(app.config['METRICS_DIR'])
+    registry = MetricsRegistry(app.config['METRICS_DIR'],
+                               flush_interval=app.config.get('METRICS_FLUSH_INTERVAL', 1.0),
+                               logger=app.logger)
+    registry.add_collector(lambda: _process_totals(app))
+    app.extensions['metrics'] = registry
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+    def start_request():
+        if request.endpoint != 'metrics':
+            _start_request()
+
+    app.before_request(start_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
+    return registry
@@ -39,8 +39,8 @@ class Laporan(db.Model):
     deskripsi = db.Column(db.Text, nullable=False)
     tgl_kejadian = db.Column(db.DateTime, nullable=False)
     bukti_file = db.Column(db.String(200))
-    status = db.Column(db.String(20), default='pending')  # pending, in_progress, resolved
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, in_progress, resolved
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Foreign key ke user yang membuat laporan
@@ -51,9 +51,52 @@ class Laporan(db.Model):
     creator = db.relationship('User', foreign_keys=[created_by], backref='created_reports')
     assignee = db.relationship('User', foreign_keys=[assigned_to], backref='assigned_reports')
     
+    # Index untuk kombinasi filter + sort yang dibuat build_search_query.
+    # Sort default dashboard adalah id, jadi filter equality dipasangkan dengan id.
+    __table_args__ = (
+        db.Index('ix_laporan_status_id', 'status', 'id'),
+        db.Index('ix_laporan_unit_id', 'unit', 'id'),
+        db.Index('ix_laporan_jenis_kesalahan_id', 'jenis_kesalahan', 'id'),
+        db.Index('ix_laporan_status_created_at', 'status', 'created_at'),
+        db.Index('ix_laporan_unit_tgl_kejadian', 'unit', 'tgl_kejadian'),
+        db.Index('ix_laporan_tgl_kejadian', 'tgl_kejadian'),
+        db.Index('ix_laporan_created_at', 'created_at'),
+        # Reference count file bukti yang dipakai bersama (content-addressed)
+        db.Index('ix_laporan_bukti_file', 'bukti_file'),
+    )
+    
     def __repr__(self):
         return f'<Laporan {self.id}: {self.unit}>'
 
+class LaporanRollup(db.Model):
+    """Jumlah laporan per hari kejadian, status, jenis kesalahan dan unit"""
+    __tablename__ = 'laporan_rollup'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    jenis_kesalahan = db.Column(db.String(50), nullable=False)
+    unit = db.Column(db.String(100), nullable=False)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        db.UniqueConstraint('day', 'status', 'jenis_kesalahan', 'unit', name='uq_laporan_rollup_key'),
+    )
+    
+    def __repr__(self):
+        return f'<LaporanRollup {self.day} {self.status} {self.jenis_kesalahan} {self.unit}: {self.total}>'
+
+class DataVersion(db.Model):
+    """Nomor versi data per tabel; naik setiap ada perubahan (untuk ETag/cache)"""
+    __tablename__ = 'data_version'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<DataVersion {self.name}: {self.version}>'
+
 class SearchPreference(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -0,0 +1,107 @@
+"""
+Conditional GET dan cache hasil render untuk halaman yang sering di-refresh
+(dashboard, statistik di layar monitor ruang IT).
+
+Key cache dibangun dari change token data_version (default laporan + user;
+halaman dengan thumbnail bukti juga memakai versi 'evidence'), endpoint,
+query string yang dinormalisasi (diurutkan), user login dan token CSRF
+session (halaman dengan form). Selama token belum berubah:
+- browser yang mengirim If-None-Match/If-Modified-Since mendapat 304;
+- request lain mendapat body hasil render sebelumnya dari LRU per proses
+  tanpa menjalankan query halaman dan tanpa render template.
+Request yang membawa flash message tidak di-cache.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, request, session, make_response
+from flask_login import current_user
+from app.versioning import get_change_token, LAPORAN_VERSION, USER_VERSION
+
+DEFAULT_VERSIONS = (LAPORAN_VERSION, USER_VERSION)
+
+
+class PageCache:
+    """LRU body response per proses, thread-safe"""
+
+    def __init__(self, max_size=128):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                self._data.move_to_end(key)
+            return item
+
+    def set(self, key, value):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+def init_page_cache(app):
+    cache = PageCache(max_size=app.config.get('PAGE_CACHE_SIZE', 128))
+    app.extensions['page_cache'] = cache
+    return cache
+
+
+def _page_key(token, csrf):
+    args = '&'.join(f'{key}={value}' for key, value in sorted(request.args.items(multi=True)))
+    user_id = current_user.get_id() if current_user.is_authenticated else ''
+    csrf_token = session.get('csrf_token', '') if csrf else ''
+    raw = f'{request.endpoint}?{args}|{token}|{user_id}|{csrf_token}'
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def cached_page(csrf=False, versions=DEFAULT_VERSIONS):
+    """
+    Decorator view GET: ETag/Last-Modified dari change token + cache render.
+    csrf=True untuk halaman yang berisi form (token CSRF ikut dalam key);
+    versions: nama data_version yang membentuk change token
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET' or session.get('_flashes'):
+                return view(*args, **kwargs)
+
+            if csrf and current_app.config.get('WTF_CSRF_ENABLED', True):
+                # Pastikan token CSRF session sudah ada sebelum key dibuat
+                from flask_wtf.csrf import generate_csrf
+                generate_csrf()
+
+            token, last_modified = get_change_token(versions)
+            key = _page_key(token, csrf)
+            cache = current_app.extensions['page_cache']
+
+            cached = cache.get(key)
+            if cached is not None:
+                body, mimetype = cached
+                response = current_app.response_class(body, mimetype=mimetype)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.direct_passthrough \
+                        or session.get('_flashes'):
+                    return response
+                cache.set(key, (response.get_data(), response.mimetype))
+
+            response.set_etag(key)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            return response.make_conditional(request)
+        return wrapper
+    return decorator
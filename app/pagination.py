@@ -0,0 +1,124 @@
+"""
+Keyset (seek) pagination untuk dashboard.
+
+Berbeda dengan query.paginate() yang memakai OFFSET dan COUNT(*), halaman
+berikutnya dicari langsung lewat index dengan kondisi
+``(sort_column, id) > (nilai_terakhir, id_terakhir)``, sehingga biaya halaman
+ke-5000 sama dengan halaman pertama. Posisi halaman disimpan dalam cursor
+opaque (base64 JSON) di URL.
+"""
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from sqlalchemy import and_, or_, asc, desc, DateTime, Date
+
+# Kolom sort yang didukung keyset; semuanya NOT NULL (status/created_at di
+# database lama diisi upgrade_schema) sehingga seek tidak melewatkan baris NULL
+KEYSET_SORT_COLUMNS = ('id', 'created_at', 'tgl_kejadian', 'unit', 'pelapor',
+                       'status', 'jenis_kesalahan')
+
+
+class InvalidCursor(ValueError):
+    """Cursor rusak atau tidak cocok dengan sort yang aktif"""
+
+
+def encode_cursor(sort_by, value, row_id, direction):
+    """Buat cursor opaque dari nilai sort dan id baris batas"""
+    if isinstance(value, (datetime, date)):
+        value = value.isoformat()
+    payload = json.dumps([sort_by, value, row_id, direction], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, sort_by, column):
+    """
+    Baca cursor dari URL.
+    Returns: (value, row_id, direction)
+    Raises: InvalidCursor jika cursor tidak valid
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        cursor_sort, value, row_id, direction = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError, binascii.Error):
+        raise InvalidCursor(cursor)
+
+    if cursor_sort != sort_by or direction not in ('next', 'prev') or not isinstance(row_id, int):
+        raise InvalidCursor(cursor)
+
+    if value is not None and isinstance(column.type, (DateTime, Date)):
+        try:
+            value = datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            raise InvalidCursor(cursor)
+    return value, row_id, direction
+
+
+class KeysetPagination:
+    """
+    Satu halaman hasil keyset pagination.
+    Atribut mirip flask_sqlalchemy Pagination (items, total, has_next,
+    has_prev) ditambah next_cursor/prev_cursor untuk membangun URL.
+    Total dihitung lazy hanya jika diakses dan tidak diberikan dari luar.
+    """
+
+    def __init__(self, query, model, sort_by='id', sort_order='asc',
+                 cursor=None, per_page=10, total=None):
+        if sort_by not in KEYSET_SORT_COLUMNS:
+            sort_by = 'id'
+        self.sort_by = sort_by
+        self.sort_order = 'desc' if sort_order == 'desc' else 'asc'
+        self.per_page = per_page
+        self._query = query.order_by(None)
+        self._total = total
+
+        column = getattr(model, sort_by)
+        id_column = model.id
+
+        direction = 'next'
+        if cursor:
+            try:
+                value, row_id, direction = decode_cursor(cursor, sort_by, column)
+            except InvalidCursor:
+                cursor = None
+                direction = 'next'
+
+        # Saat mundur (prev), urutan dibalik lalu hasil dibalik lagi
+        forward = (self.sort_order == 'asc') == (direction == 'next')
+        order = asc if forward else desc
+        query = self._query.order_by(order(column), order(id_column))
+
+        if cursor:
+            # Bentuk "col >= v AND (col > v OR id > r)" supaya bagian pertama
+            # bisa dipakai sebagai range index di semua database
+            if forward:
+                seek = and_(column >= value, or_(column > value, id_column > row_id))
+            else:
+                seek = and_(column <= value, or_(column < value, id_column < row_id))
+            query = query.filter(seek)
+
+        rows = query.limit(per_page + 1).all()
+        has_more = len(rows) > per_page
+        rows = rows[:per_page]
+        if direction == 'prev':
+            rows.reverse()
+
+        self.items = rows
+        if direction == 'next':
+            self.has_next = has_more
+            self.has_prev = cursor is not None
+        else:
+            self.has_prev = has_more
+            self.has_next = True
+
+        self.next_cursor = self._cursor_for(rows[-1], 'next') if self.has_next and rows else None
+        self.prev_cursor = self._cursor_for(rows[0], 'prev') if self.has_prev and rows else None
+
+    def _cursor_for(self, row, direction):
+        return encode_cursor(self.sort_by, getattr(row, self.sort_by), row.id, direction)
+
+    @property
+    def total(self):
+        if self._total is None:
+            self._total = self._query.count()
+        return self._total
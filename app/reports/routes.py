@@ -1,10 +1,16 @@
-from flask import render_template, redirect, url_for, flash, request, current_app
+from flask import render_template, redirect, url_for, flash, request, current_app, send_file, abort, jsonify, Response
+from werkzeug.security import safe_join
 from flask_login import login_required, current_user
 from datetime import datetime
+import io
+import mimetypes
+import os
 from app import db
 from app.models import Laporan
-from app.forms import LaporanForm, EditStatusForm
-from app.utils import save_upload_file, delete_upload_file, sanitize_input, format_datetime
+from app.forms import LaporanForm, EditStatusForm, BulkUpdateForm
+from app.utils import (save_upload_file, delete_upload_file, sanitize_input, format_datetime,
+                       remember_unit, invalidate_unit_choices, build_search_query, bulk_update_laporan)
+from app.thumbnails import schedule_derivatives, evidence_url, is_image
 from . import bp
 
 @bp.route("/tambah", methods=["GET", "POST"])
@@ -38,6 +44,11 @@ def tambah_laporan():
             
             db.session.add(laporan)
             db.session.commit()
+            remember_unit(laporan.unit)
+            
+            # Thumbnail/preview gambar dibuat di background setelah commit
+            if filename:
+                schedule_derivatives(filename)
             
             flash('Laporan berhasil ditambahkan', 'success')
             username = current_user.username if current_user.is_authenticated else 'anonymous'
@@ -57,12 +68,63 @@ def tambah_laporan():
 def detail(id):
     try:
         laporan = Laporan.query.get_or_404(id)
-        return render_template("detail_laporan_modern.html", laporan=laporan, format_datetime=format_datetime)
+        return render_template("detail_laporan_modern.html", laporan=laporan, format_datetime=format_datetime,
+                               evidence_url=evidence_url, is_image=is_image)
     except Exception as e:
         current_app.logger.error(f'Error loading report detail: {str(e)}')
         flash('Laporan tidak ditemukan', 'error')
         return redirect(url_for('main.dashboard'))
 
+@bp.route("/bukti/<path:filename>")
+# @login_required  # DISABLED for development
+def evidence(filename):
+    """
+    Download file bukti dengan ETag kuat, Range request dan cache private immutable.
+    Dengan EVIDENCE_OFFLOAD byte file dikirim oleh nginx/Apache, bukan worker Python.
+    """
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    path = safe_join(upload_folder, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+    
+    # <sha256>.pdf atau derivative <sha256>_thumb.jpg: isi tidak pernah berubah
+    name = os.path.splitext(os.path.basename(filename))[0]
+    content_hash = name.split('_')[0]
+    is_content_addressed = len(content_hash) == 64 and all(c in '0123456789abcdef' for c in content_hash)
+    etag = name if is_content_addressed else True
+    as_attachment = request.args.get('download') == '1'
+    max_age = current_app.config.get('EVIDENCE_MAX_AGE', 31536000)
+    offload = current_app.config.get('EVIDENCE_OFFLOAD')
+    
+    if offload in ('x-accel', 'x-sendfile'):
+        # Proxy yang mengirim byte file (termasuk Range); Python hanya mengisi header
+        response = current_app.response_class(
+            mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        )
+        if as_attachment:
+            response.headers['Content-Disposition'] = f'attachment; filename={os.path.basename(filename)}'
+        response.last_modified = os.path.getmtime(path)
+        if isinstance(etag, str):
+            response.set_etag(etag)
+        response.make_conditional(request)
+        # 304/412 tidak boleh membuat proxy tetap mengirim isi file
+        if response.status_code in (200, 206):
+            if offload == 'x-accel':
+                response.headers['X-Accel-Redirect'] = current_app.config['EVIDENCE_ACCEL_PREFIX'] + filename
+            else:
+                response.headers['X-Sendfile'] = os.path.abspath(path)
+    else:
+        response = send_file(path, as_attachment=as_attachment, etag=etag,
+                             conditional=True, max_age=max_age)
+    
+    # File pasien: boleh di-cache browser, tidak oleh proxy/CDN bersama
+    # (send_file memasang public bersama max_age)
+    response.cache_control.public = False
+    response.cache_control.private = True
+    response.cache_control.max_age = max_age
+    response.cache_control.immutable = True
+    return response
+
 @bp.route("/edit_status/<int:id>", methods=["GET", "POST"])
 # @login_required  # DISABLED for development
 def edit_status(id):
@@ -70,6 +132,7 @@ def edit_status(id):
     try:
         laporan = Laporan.query.get_or_404(id)
         form = EditStatusForm()
+        form.include_assignee(laporan.assigned_to, current=True)
         
         if form.validate_on_submit():
             # Update status
@@ -77,10 +140,9 @@ def edit_status(id):
             
             # Only admin can assign to other users
             if current_user.is_authenticated and current_user.is_admin():
-                if form.assigned_to.data and form.assigned_to.data != 0:
-                    laporan.assigned_to = form.assigned_to.data
-                else:
-                    laporan.assigned_to = None
+                assigned_to = form.assigned_to.data or None
+                if assigned_to != laporan.assigned_to:
+                    laporan.assigned_to = assigned_to
             
             # Update timestamp
             laporan.updated_at = datetime.utcnow()
@@ -97,6 +159,8 @@ def edit_status(id):
             form.status.data = laporan.status
             if current_user.is_authenticated and current_user.is_admin():
                 form.assigned_to.data = laporan.assigned_to if laporan.assigned_to else 0
+        if form.assignee_lookup:
+            form.include_assignee(form.assigned_to.data or laporan.assigned_to)
         
         return render_template("edit_status_modern.html", form=form, laporan=laporan, format_datetime=format_datetime)
         
@@ -105,6 +169,107 @@ def edit_status(id):
         flash('Terjadi kesalahan saat mengedit status', 'error')
         return redirect(url_for('reports.detail', id=id))
 
+class BulkUpdateError(ValueError):
+    """Parameter aksi massal tidak valid"""
+
+
+def _run_bulk_update(ids, filters, status, assigned_to):
+    """
+    Validasi parameter aksi massal lalu jalankan satu UPDATE.
+    ids: list id laporan, atau None untuk memakai filters (hasil build_search_query)
+    Returns: jumlah laporan yang diubah
+    Raises: BulkUpdateError, PermissionError (assign oleh non-admin)
+    """
+    from app.user_cache import load_cached_user
+    
+    valid_status = {value for value, label in EditStatusForm.status.kwargs['choices']}
+    if status and status not in valid_status:
+        raise BulkUpdateError(f'Status tidak valid: {status}')
+    if assigned_to is not None:
+        # Only admin can assign to other users (sama seperti edit_status)
+        if not (current_user.is_authenticated and current_user.is_admin()):
+            raise PermissionError('Hanya admin yang dapat menugaskan laporan')
+        if assigned_to:
+            user = load_cached_user(assigned_to)
+            if user is None or not user.is_active:
+                raise BulkUpdateError('User tidak ditemukan atau tidak aktif')
+    if not status and assigned_to is None:
+        raise BulkUpdateError('Pilih status atau assignment yang akan diubah')
+    
+    if ids is not None:
+        max_ids = current_app.config.get('BULK_UPDATE_MAX_IDS', 5000)
+        if not ids:
+            raise BulkUpdateError('Tidak ada laporan yang dipilih')
+        if len(ids) > max_ids:
+            raise BulkUpdateError(f'Maksimal {max_ids} laporan per aksi; gunakan filter pencarian')
+        query = Laporan.query.filter(Laporan.id.in_(ids))
+    elif filters is not None:
+        query = build_search_query(filters)
+    else:
+        raise BulkUpdateError('ids atau filters wajib diisi')
+    
+    updated = bulk_update_laporan(query, status=status or None, assigned_to=assigned_to)
+    username = current_user.username if current_user.is_authenticated else 'anonymous'
+    current_app.logger.info(f'Bulk update by {username}: {updated} reports (status={status}, assigned_to={assigned_to})')
+    return updated
+
+@bp.route("/bulk_update", methods=["POST"])
+# @login_required  # DISABLED for development
+def bulk_update():
+    """
+    Ubah status dan/atau assignment banyak laporan dengan satu UPDATE.
+    JSON: {"ids": [...]} atau {"filters": {parameter pencarian}}, ditambah
+    "status" dan/atau "assigned_to" (0 = hapus assignment); response
+    {"updated": n}. Form dashboard: id terpilih (ids) atau scope=all untuk
+    semua hasil pencarian di query string, lalu redirect ke dashboard.
+    """
+    if request.is_json:
+        data = request.get_json(silent=True) or {}
+        try:
+            ids = data.get('ids')
+            if ids is not None:
+                if not isinstance(ids, list):
+                    raise BulkUpdateError('ids harus berupa list')
+                ids = [int(value) for value in ids]
+            assigned_to = data.get('assigned_to')
+            if assigned_to is not None:
+                assigned_to = int(assigned_to)
+            filters = data.get('filters')
+            if filters is not None and not isinstance(filters, dict):
+                raise BulkUpdateError('filters harus berupa object')
+            updated = _run_bulk_update(ids, filters, data.get('status'), assigned_to)
+        except PermissionError as e:
+            return jsonify({'error': str(e)}), 403
+        except (BulkUpdateError, TypeError, ValueError) as e:
+            message = str(e) if isinstance(e, BulkUpdateError) else 'Parameter tidak valid'
+            return jsonify({'error': message}), 400
+        except Exception as e:
+            current_app.logger.error(f'Error in bulk update: {str(e)}')
+            return jsonify({'error': 'Terjadi kesalahan saat mengubah laporan'}), 500
+        return jsonify({'updated': updated})
+    
+    # Filter pencarian dashboard ikut di query string action form
+    dashboard_url = url_for('main.dashboard', **request.args)
+    form = BulkUpdateForm()
+    if not form.validate_on_submit():
+        flash('Aksi massal tidak valid', 'error')
+        return redirect(dashboard_url)
+    
+    try:
+        if form.scope.data == 'all':
+            ids = None
+        else:
+            ids = [int(value) for value in request.form.getlist('ids') if value.isdigit()]
+        assigned_to = form.assigned_to.data if form.assigned_to.data not in (None, -1) else None
+        updated = _run_bulk_update(ids, request.args, form.status.data, assigned_to)
+        flash(f'{updated} laporan berhasil diupdate', 'success')
+    except (BulkUpdateError, PermissionError) as e:
+        flash(str(e), 'error')
+    except Exception as e:
+        current_app.logger.error(f'Error in bulk update: {str(e)}')
+        flash('Terjadi kesalahan saat mengubah laporan', 'error')
+    return redirect(dashboard_url)
+
 @bp.route("/delete_laporan/<int:id>", methods=["POST", "GET"])
 # @login_required  # DISABLED for development
 def delete_laporan(id):
@@ -116,14 +281,16 @@ def delete_laporan(id):
     
     try:
         laporan = Laporan.query.get_or_404(id)
-        
-        # Delete associated file if exists
-        if laporan.bukti_file:
-            delete_upload_file(laporan.bukti_file)
+        bukti_file = laporan.bukti_file
         
         # Delete laporan
         db.session.delete(laporan)
         db.session.commit()
+        invalidate_unit_choices()
+        
+        # Delete associated file if no other laporan still uses it
+        if bukti_file:
+            delete_upload_file(bukti_file)
         
         flash('Laporan berhasil dihapus', 'success')
         username = current_user.username if current_user.is_authenticated else 'anonymous'
@@ -135,3 +302,54 @@ def delete_laporan(id):
         current_app.logger.error(f'Error deleting report: {str(e)}')
         flash('Terjadi kesalahan saat menghapus laporan', 'error')
         return redirect(url_for('reports.detail', id=id))
+
+@bp.route("/import", methods=["POST"])
+# @login_required  # DISABLED for development
+def import_laporan():
+    """
+    Import laporan massal dari CSV/XLSX (field multipart ``file``) - admin only.
+    Returns: JSON ringkasan dan error per baris, atau CSV error jika ?report=csv
+    """
+    # DISABLED: Skip admin check for development
+    # if not current_user.is_admin():
+    #     return jsonify({'error': 'Akses ditolak'}), 403
+    from app.importer import ImportFileError, import_laporan as run_import, iter_import_rows, write_error_report
+    
+    upload = request.files.get('file')
+    if not upload or not upload.filename:
+        return jsonify({'error': 'File import wajib diunggah'}), 400
+    
+    created_by_id = current_user.id if current_user.is_authenticated else None
+    try:
+        result = run_import(
+            iter_import_rows(upload.stream, upload.filename),
+            batch_size=current_app.config.get('IMPORT_BATCH_SIZE', 1000),
+            created_by=created_by_id,
+            dry_run=request.args.get('dry_run') == '1'
+        )
+    except ImportFileError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        current_app.logger.error(f'Error importing reports: {str(e)}')
+        return jsonify({'error': 'Terjadi kesalahan saat import data'}), 500
+    
+    username = current_user.username if current_user.is_authenticated else 'anonymous'
+    current_app.logger.info(f"Bulk import by {username}: {result['inserted']}/{result['total']} rows")
+    
+    if request.args.get('report') == 'csv':
+        output = io.StringIO()
+        write_error_report(result['errors'], output)
+        return Response(output.getvalue(), mimetype='text/csv', headers={
+            'Content-Disposition': 'attachment; filename=import_errors.csv'
+        })
+    
+    max_errors = current_app.config.get('IMPORT_MAX_REPORTED_ERRORS', 1000)
+    return jsonify({
+        'total': result['total'],
+        'inserted': result['inserted'],
+        'error_count': len(result['errors']),
+        'errors': [
+            {'row': row, 'field': field, 'message': message}
+            for row, field, message in result['errors'][:max_errors]
+        ]
+    })
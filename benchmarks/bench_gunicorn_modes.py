@@ -0,0 +1,131 @@
+"""
+Bandingkan mode gunicorn (sync, sync + preload, gthread + preload) pada route
+dashboard dan export CSV: throughput (request/detik), latency p50 dan memori
+total master + worker (RSS dan PSS; PSS membagi halaman memori yang dipakai
+bersama, sehingga efek preload_app terlihat). Butuh Linux (/proc).
+
+Usage:
+    python benchmarks/bench_gunicorn_modes.py [--rows 50000] [--seconds 10] [--clients 8] [--workers 2]
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+import urllib.request
+from http.client import HTTPException
+
+from common import BenchConfig, create_bench_app, run_gunicorn, seed
+from app import db
+
+MODES = {
+    'sync': {'GUNICORN_WORKER_CLASS': 'sync', 'GUNICORN_PRELOAD': '0'},
+    'sync+preload': {'GUNICORN_WORKER_CLASS': 'sync', 'GUNICORN_PRELOAD': '1'},
+    'gthread+preload': {'GUNICORN_WORKER_CLASS': 'gthread', 'GUNICORN_PRELOAD': '1'},
+}
+
+ROUTES = {
+    'dashboard': '/dashboard?status_filter=pending&page={n}',
+    'export': '/export?format=csv&unit_filter=IGD&jenis_filter=Transaksi',
+}
+
+
+def _process_tree(pid):
+    pids = [pid]
+    for task in os.listdir(f'/proc/{pid}/task'):
+        with open(f'/proc/{pid}/task/{task}/children') as f:
+            pids += [int(child) for child in f.read().split()]
+    return pids
+
+
+def _memory_mb(pids):
+    """Total RSS dan PSS (MiB) untuk sekumpulan proses"""
+    rss = pss = 0
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/smaps_rollup') as f:
+                for line in f:
+                    if line.startswith('Rss:'):
+                        rss += int(line.split()[1])
+                    elif line.startswith('Pss:'):
+                        pss += int(line.split()[1])
+        except OSError:
+            pass
+    return rss / 1024, pss / 1024
+
+
+def _load(base_url, path, seconds, clients):
+    latencies, errors = [], []
+    stop = time.time() + seconds
+
+    def client(index):
+        n = index
+        while time.time() < stop:
+            n += 1
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(base_url + path.format(n=n % 50 + 1), timeout=60) as r:
+                    r.read()
+            except (OSError, HTTPException) as e:
+                errors.append(str(e))
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return {
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies) * 1000, 1) if latencies else None,
+        'errors': len(errors),
+    }
+
+
+def run_mode(name, env_overrides, database_url, args):
+    env = dict(WEB_CONCURRENCY=str(args.workers), PAGE_CACHE_SIZE='0', **env_overrides)
+    with run_gunicorn(database_url, env) as (base_url, process):
+        result = {'mode': name}
+        for route, path in ROUTES.items():
+            result[route] = _load(base_url, path, args.seconds, args.clients)
+        rss, pss = _memory_mb(_process_tree(process.pid))
+        result['rss_mb'] = round(rss, 1)
+        result['pss_mb'] = round(pss, 1)
+
+    print(f"{name:<16} dashboard={result['dashboard']['rps']:>7} req/s "
+          f"(p50 {result['dashboard']['p50_ms']}ms)  export={result['export']['rps']:>6} req/s "
+          f"(p50 {result['export']['p50_ms']}ms)  rss={result['rss_mb']}MiB pss={result['pss_mb']}MiB")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--modes', default=','.join(MODES))
+    parser.add_argument('--json', help='Simpan hasil ke file JSON')
+    args = parser.parse_args()
+
+    database_url = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+    config = type('GunicornBenchConfig', (BenchConfig,), {'SQLALCHEMY_DATABASE_URI': database_url})
+    app = create_bench_app(config)
+    with app.app_context():
+        print(f'Seeding {args.rows} laporan...')
+        seed(args.rows)
+        db.engine.dispose()
+
+    results = [run_mode(name, MODES[name], database_url, args) for name in args.modes.split(',')]
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
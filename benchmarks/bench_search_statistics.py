@@ -0,0 +1,65 @@
+"""
+Benchmark get_search_statistics: implementasi lama (8 query count) vs
+implementasi baru (satu query GROUP BY) pada tabel laporan yang besar.
+
+Usage:
+    python benchmarks/bench_search_statistics.py [--rows 200000] [--repeat 5]
+"""
+import argparse
+import statistics
+import time
+
+from common import JENIS, STATUS, create_bench_app, ensure_rows
+from app.models import Laporan
+from app.utils import build_search_query, get_search_statistics
+
+SCENARIOS = [
+    ('tanpa filter', {}),
+    ('status', {'status_filter': 'pending'}),
+    ('unit + tanggal', {'unit_filter': 'IGD', 'date_from': '2024-03-01', 'date_to': '2024-06-30'}),
+    ('teks', {'search_query': 'printer'}),
+]
+
+
+def legacy_search_statistics(query):
+    """Implementasi lama: satu count() per status dan per jenis"""
+    total = query.count()
+    status_stats = {}
+    for status in STATUS:
+        status_stats[status] = query.filter(Laporan.status == status).count()
+    jenis_stats = {}
+    for jenis in JENIS:
+        jenis_stats[jenis] = query.filter(Laporan.jenis_kesalahan == jenis).count()
+    return {'total': total, 'status_stats': status_stats, 'jenis_stats': jenis_stats}
+
+
+def measure(fn, query, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(query)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_bench_app()
+    with app.app_context():
+        ensure_rows(args.rows)
+
+        print(f'{"skenario":<16} {"lama (ms)":>10} {"baru (ms)":>10} {"speedup":>8}')
+        for name, params in SCENARIOS:
+            query = build_search_query(params)
+            assert legacy_search_statistics(query) == get_search_statistics(query)
+            old = measure(legacy_search_statistics, query, args.repeat)
+            new = measure(get_search_statistics, query, args.repeat)
+            print(f'{name:<16} {old:>10.1f} {new:>10.1f} {old / new:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Regression check jumlah SQL statement: export, dashboard dan statistik harus
+mengeluarkan jumlah statement yang sama berapapun jumlah barisnya (tidak ada
+N+1 lazy load creator/assignee). Exit code 1 jika jumlahnya bertambah
+seiring jumlah baris.
+
+Usage:
+    python benchmarks/check_query_counts.py
+"""
+import sys
+
+from common import count_statements, create_bench_app, seed
+from app import db
+from app.models import User
+
+# Rentang tanggal kecil vs besar -> jumlah baris berbeda jauh
+SMALL = 'date_from=2024-01-01&date_to=2024-01-02'
+LARGE = 'date_from=2024-01-01&date_to=2024-12-31'
+
+ROUTES = [
+    ('export csv', '/export?format=csv&{}'),
+    ('export excel', '/export?format=excel&{}'),
+    ('dashboard', '/dashboard?{}'),
+    ('dashboard sort created_at', '/dashboard?sort_by=created_at&sort_order=desc&{}'),
+]
+
+
+def main():
+    app = create_bench_app()
+    # Yang diukur adalah jalur render; cache halaman dashboard/statistik dimatikan
+    app.extensions['page_cache'].max_size = 0
+    client = app.test_client()
+    failures = []
+
+    with app.app_context():
+        users = [User(username=f'teknisi{i}', role='user', password_hash='-') for i in range(20)]
+        db.session.add_all(users)
+        db.session.commit()
+        seed(5000, user_ids=[user.id for user in users])
+
+        checks = [(name, url.format(SMALL), url.format(LARGE)) for name, url in ROUTES]
+        checks.append(('statistik', '/statistik', '/statistik'))
+
+        for name, small_url, large_url in checks:
+            # Request pertama mengisi cache (mis. facet unit), tidak ikut dihitung
+            client.get(small_url).get_data()
+            counts = []
+            for url in (small_url, large_url):
+                with count_statements() as counter:
+                    response = client.get(url)
+                    response.get_data()
+                if response.status_code != 200:
+                    failures.append(name)
+                counts.append(counter['count'])
+            failed = counts[0] != counts[1] or name in failures
+            print(f'[{"FAIL" if failed else " OK "}] {name}: {counts[0]} vs {counts[1]} statement')
+            if failed and name not in failures:
+                failures.append(name)
+
+    if failures:
+        print(f'\nJumlah statement tidak konstan: {", ".join(failures)}')
+        sys.exit(1)
+    print('\nJumlah statement konstan untuk semua route.')
+
+
+if __name__ == '__main__':
+    main()
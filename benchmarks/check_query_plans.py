@@ -0,0 +1,117 @@
+"""
+Regression check query plan: jalankan EXPLAIN pada query yang dihasilkan
+build_search_query untuk filter umum dashboard, dan gagal (exit code 1)
+jika salah satunya membaca seluruh tabel laporan: sequential scan, atau
+full index scan (SQLite "SCAN ... USING INDEX", Postgres Index Scan tanpa
+Index Cond). Planner memakai setting default dan statistik hasil ANALYZE.
+
+Usage:
+    python benchmarks/check_query_plans.py [--rows 20000]
+    BENCH_DATABASE_URL=postgresql://... python benchmarks/check_query_plans.py
+"""
+import argparse
+import json
+import sys
+
+from sqlalchemy import text
+
+from common import create_bench_app, ensure_rows
+from app import db
+from app.utils import build_search_query
+
+# Kombinasi filter + sort yang umum dipakai di dashboard
+SCENARIOS = [
+    ('status', {'status_filter': 'pending'}),
+    ('unit', {'unit_filter': 'IGD'}),
+    ('jenis', {'jenis_filter': 'Transaksi'}),
+    ('rentang tanggal', {'date_from': '2024-03-01', 'date_to': '2024-03-07',
+                         'sort_by': 'tgl_kejadian'}),
+    ('status + created_at desc', {'status_filter': 'resolved',
+                                  'sort_by': 'created_at', 'sort_order': 'desc'}),
+    ('unit + rentang tanggal', {'unit_filter': 'ICU', 'date_from': '2024-05-01',
+                                'date_to': '2024-05-31'}),
+    ('teks', {'search_query': 'printer'}),
+]
+
+
+def _plan_nodes(node):
+    yield node
+    for child in node.get('Plans', []):
+        yield from _plan_nodes(child)
+
+
+def explain(query, per_page=10):
+    """Returns: baris-baris plan untuk halaman pertama query"""
+    statement = query.limit(per_page).statement
+    compiled = statement.compile(dialect=db.engine.dialect)
+    sql = str(compiled)
+
+    with db.engine.connect() as conn:
+        if db.engine.dialect.name == 'sqlite':
+            params = tuple(compiled.params[name] for name in compiled.positiontup)
+            rows = conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + sql, params).all()
+            return [row[-1] for row in rows]
+
+        # Satu baris per node: "<Node Type> on <tabel> [using <index>] [cond: ...]"
+        plan = conn.exec_driver_sql('EXPLAIN (FORMAT JSON) ' + sql, compiled.params).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        lines = []
+        for node in _plan_nodes(plan[0]['Plan']):
+            line = node['Node Type']
+            if 'Relation Name' in node:
+                line += f" on {node['Relation Name']}"
+            if 'Index Name' in node:
+                line += f" using {node['Index Name']}"
+            if 'Index Cond' in node:
+                line += f" cond: {node['Index Cond']}"
+            lines.append(line)
+        return lines
+
+
+def is_full_scan(plan):
+    for line in plan:
+        # SQLite: filter lewat index tampil sebagai "SEARCH laporan ..."; "SCAN laporan"
+        # (juga "USING INDEX"/"USING COVERING INDEX") membaca seluruh tabel/index
+        if line == 'SCAN laporan' or line.startswith('SCAN laporan '):
+            return True
+        # Postgres: Seq Scan, atau Index Scan tanpa Index Cond (hanya untuk urutan)
+        if line.startswith('Seq Scan on laporan'):
+            return True
+        if line.startswith(('Index Scan on laporan', 'Index Only Scan on laporan')) and ' cond: ' not in line:
+            return True
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--verbose', action='store_true', help='tampilkan plan lengkap')
+    args = parser.parse_args()
+
+    app = create_bench_app()
+    failures = []
+    with app.app_context():
+        ensure_rows(args.rows)
+        # Statistik planner harus mutakhir juga untuk database uji yang sudah ada
+        db.session.execute(text('ANALYZE laporan'))
+        db.session.commit()
+
+        for name, params in SCENARIOS:
+            plan = explain(build_search_query(params))
+            failed = is_full_scan(plan)
+            print(f'[{"FAIL" if failed else " OK "}] {name}')
+            if failed or args.verbose:
+                for line in plan:
+                    print(f'         {line}')
+            if failed:
+                failures.append(name)
+
+    if failures:
+        print(f'\n{len(failures)} query membaca seluruh tabel/index: {", ".join(failures)}')
+        sys.exit(1)
+    print('\nSemua query memakai index.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""
+Concurrency check SQLite: pembaca (dashboard) harus tetap jalan selama ada
+transaksi tulis besar yang sedang berlangsung (mis. import atau banyak
+tambah_laporan). Script menjalankan penulis dan beberapa pembaca bersamaan,
+sekali dengan PRAGMA dari config (WAL) dan sekali dengan journal_mode=DELETE
+sebagai pembanding. Exit code 1 jika pada mode WAL ada pembaca yang gagal
+atau tidak ada request baca yang selesai selama transaksi tulis terbuka.
+
+Usage:
+    python benchmarks/check_sqlite_concurrency.py [--rows 20000] [--seconds 5]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from common import BenchConfig, create_bench_app, seed, UNITS, JENIS
+from app import db
+from app.models import Laporan
+
+# Transaksi tulis dibuat sengaja panjang supaya efek lock terlihat
+WRITE_BATCH = 5000
+WRITE_HOLD = 1.0
+
+
+def make_config(journal_mode):
+    pragmas = dict(BenchConfig.SQLITE_PRAGMAS, journal_mode=journal_mode,
+                   cache_size=-2000)
+    return type(f'Bench{journal_mode}Config', (BenchConfig,), {
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db'),
+        'SQLITE_PRAGMAS': pragmas,
+        'PAGE_CACHE_SIZE': 0,
+    })
+
+
+def writer(app, stop, holding, stats):
+    from datetime import datetime
+    with app.app_context():
+        while not stop.is_set():
+            now = datetime.utcnow()
+            rows = [{
+                'unit': UNITS[i % len(UNITS)], 'pelapor': f'Writer {i}', 'modul_simrs': 'Farmasi',
+                'jenis_kesalahan': JENIS[i % len(JENIS)], 'deskripsi': 'import lambat',
+                'tgl_kejadian': now, 'status': 'pending', 'created_at': now, 'updated_at': now,
+            } for i in range(WRITE_BATCH)]
+            started = time.perf_counter()
+            try:
+                db.session.execute(Laporan.__table__.insert(), rows)
+                holding.set()
+                time.sleep(WRITE_HOLD)
+                db.session.commit()
+                stats['commits'] += 1
+            except Exception as e:
+                db.session.rollback()
+                stats['errors'].append(str(e))
+            finally:
+                holding.clear()
+            stats['durations'].append(time.perf_counter() - started)
+
+
+def reader(app, stop, holding, latencies, errors, overlapped):
+    client = app.test_client()
+    while not stop.is_set():
+        during_write = holding.is_set()
+        started = time.perf_counter()
+        try:
+            response = client.get('/dashboard?status_filter=pending&page=2')
+            response.get_data()
+            if response.status_code != 200:
+                errors.append(response.status_code)
+        except Exception as e:
+            errors.append(str(e))
+        latencies.append(time.perf_counter() - started)
+        # Request yang mulai dan selesai selagi transaksi tulis masih terbuka
+        if during_write and holding.is_set():
+            overlapped.append(1)
+
+
+def run(journal_mode, rows, seconds, readers):
+    app = create_bench_app(make_config(journal_mode))
+    with app.app_context():
+        seed(rows)
+        active_mode = db.session.execute(db.text('PRAGMA journal_mode')).scalar()
+        db.session.remove()
+
+    stop, holding = threading.Event(), threading.Event()
+    write_stats = {'commits': 0, 'errors': [], 'durations': []}
+    latencies, errors, overlapped = [], [], []
+    threads = [threading.Thread(target=writer, args=(app, stop, holding, write_stats))]
+    threads += [threading.Thread(target=reader, args=(app, stop, holding, latencies, errors, overlapped))
+                for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    result = {
+        'journal_mode': active_mode,
+        'reads': len(latencies),
+        'read_errors': len(errors),
+        'reads_during_write': len(overlapped),
+        'read_p50_ms': statistics.median(latencies) * 1000 if latencies else None,
+        'read_max_ms': max(latencies) * 1000 if latencies else None,
+        'commits': write_stats['commits'],
+        'write_errors': len(write_stats['errors']),
+        'write_max_ms': max(write_stats['durations']) * 1000 if write_stats['durations'] else None,
+    }
+    print(f"[{journal_mode:>6}] journal_mode={result['journal_mode']} reads={result['reads']} "
+          f"during_write={result['reads_during_write']} read_errors={result['read_errors']} p50={result['read_p50_ms']:.1f}ms "
+          f"max={result['read_max_ms']:.1f}ms commits={result['commits']} "
+          f"write_errors={result['write_errors']}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--readers', type=int, default=4)
+    args = parser.parse_args()
+
+    wal = run(BenchConfig.SQLITE_PRAGMAS['journal_mode'], args.rows, args.seconds, args.readers)
+    run('DELETE', args.rows, args.seconds, args.readers)
+
+    # Di mode WAL pembaca tidak boleh menunggu selesainya transaksi tulis
+    failed = wal['read_errors'] or wal['reads_during_write'] == 0
+    if failed:
+        print('\nPembaca terblokir oleh transaksi tulis pada mode WAL')
+        sys.exit(1)
+    print('\nPembaca tetap berjalan selama transaksi tulis (WAL).')
+
+
+if __name__ == '__main__':
+    main()
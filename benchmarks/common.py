@@ -0,0 +1,246 @@
+"""Helper bersama untuk script benchmark: app factory, seeding data sintetis,
+pengukuran waktu/jumlah statement dan hasil JSON yang bisa dibandingkan."""
+import json
+import os
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import sqlalchemy
+from sqlalchemy import event, text
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app import create_app, db
+from app.models import Laporan
+from app.schema import upgrade_schema
+from config import Config
+
+UNITS = ['IGD', 'Rawat Inap', 'Rawat Jalan', 'ICU', 'Farmasi', 'Laboratorium', 'Kasir']
+JENIS = ['Data Pasien', 'Transaksi', 'Sistem Error', 'Lainnya']
+STATUS = ['pending', 'in_progress', 'resolved']
+WORDS = ['printer', 'server', 'lambat', 'obat', 'salah', 'input', 'tagihan', 'pasien', 'error', 'login']
+
+
+class BenchConfig(Config):
+    TESTING = True
+    WTF_CSRF_ENABLED = False
+    # BENCH_DATABASE_URL bisa diarahkan ke Postgres; default SQLite sementara
+    SQLALCHEMY_DATABASE_URI = os.environ.get('BENCH_DATABASE_URL') or \
+        'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+    METRICS_DIR = tempfile.mkdtemp()
+
+
+def create_bench_app(config_class=BenchConfig):
+    """Buat app dengan schema lengkap (tabel, index, full-text index)"""
+    app = create_app(config_class)
+    with app.app_context():
+        db.create_all()
+        upgrade_schema(db.engine)
+    return app
+
+
+def seed(rows, batch_size=10000, user_ids=None):
+    """
+    Insert laporan sintetis secara batch (butuh app context).
+    Jika user_ids diberikan, created_by/assigned_to diisi acak dari daftar itu.
+    """
+    rnd = random.Random(42)
+    start = datetime(2024, 1, 1)
+    batch = []
+    for i in range(rows):
+        batch.append({
+            'unit': rnd.choice(UNITS),
+            'pelapor': f'Pelapor {rnd.randint(1, 500)}',
+            'modul_simrs': 'Farmasi',
+            'jenis_kesalahan': rnd.choice(JENIS),
+            'deskripsi': ' '.join(rnd.sample(WORDS, 4)),
+            'tgl_kejadian': start + timedelta(minutes=rnd.randint(0, 525600)),
+            'status': rnd.choice(STATUS),
+            'created_at': start + timedelta(minutes=i),
+            'updated_at': start + timedelta(minutes=i),
+            'created_by': rnd.choice(user_ids) if user_ids else None,
+            'assigned_to': rnd.choice(user_ids) if user_ids else None,
+        })
+        if len(batch) == batch_size:
+            db.session.execute(Laporan.__table__.insert(), batch)
+            batch = []
+    if batch:
+        db.session.execute(Laporan.__table__.insert(), batch)
+    db.session.commit()
+
+
+def ensure_rows(rows):
+    """Seed sampai tabel laporan berisi minimal `rows` baris"""
+    existing = Laporan.query.count()
+    if existing < rows:
+        print(f'Seeding {rows - existing} laporan...')
+        seed(rows - existing)
+        # Statistik planner harus mencerminkan volume data yang baru
+        db.session.execute(text('ANALYZE laporan'))
+        db.session.commit()
+
+
+def ensure_realistic_rows(rows, seed_value=42, users=20):
+    """
+    Seed data realistis (app.seed, distribusi dari LaporanForm) sampai tabel
+    laporan berisi minimal `rows` baris. Database kosong + seed sama = data identik.
+    """
+    from app.seed import seed_laporan
+
+    existing = Laporan.query.count()
+    if existing < rows:
+        print(f'Seeding {rows - existing} laporan realistis...')
+        seed_laporan(rows - existing, seed=seed_value + existing, users=users)
+        db.session.execute(text('ANALYZE laporan'))
+        db.session.commit()
+
+
+@contextmanager
+def count_statements():
+    """Hitung SQL statement yang dijalankan engine selama blok (butuh app context)"""
+    counter = {'count': 0}
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        counter['count'] += 1
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def measure(fn, repeat=5, warmup=1):
+    """
+    Jalankan fn beberapa kali.
+    Returns: dict waktu (ms) min/median/p95/mean dan jumlah statement per panggilan
+    """
+    for _ in range(warmup):
+        fn()
+    timings = []
+    with count_statements() as counter:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        'repeat': repeat,
+        'min_ms': round(timings[0], 3),
+        'median_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'statements': counter['count'] // repeat,
+    }
+
+
+def bench_metadata(**extra):
+    """Konteks hasil benchmark: commit git, versi dan dialect database"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return dict({
+        'commit': commit,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'sqlalchemy': sqlalchemy.__version__,
+        'dialect': db.engine.dialect.name,
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+    }, **extra)
+
+
+def write_results(path, metadata, results):
+    with open(path, 'w') as f:
+        json.dump({'meta': metadata, 'results': results}, f, indent=2, default=str)
+
+
+def compare_results(baseline_path, results, metadata=None, threshold=1.25, key='min_ms'):
+    """
+    Bandingkan hasil dengan file baseline (output write_results commit lain).
+    key default min_ms karena paling tahan noise dari proses lain di mesin.
+    Returns: list nama case yang lebih lambat dari baseline x threshold atau
+    jumlah statement-nya bertambah
+    """
+    with open(baseline_path) as f:
+        data = json.load(f)
+    baseline = data['results']
+    for field in ('rows', 'seed', 'dialect'):
+        if metadata and data['meta'].get(field) != metadata.get(field):
+            print(f"Peringatan: {field} berbeda dari baseline "
+                  f"({data['meta'].get(field)} vs {metadata.get(field)})")
+
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        ratio = current[key] / previous[key] if previous[key] else 1.0
+        more_statements = current.get('statements', 0) > previous.get('statements', 0)
+        flag = ratio > threshold or more_statements
+        print(f'[{"SLOW" if flag else " OK "}] {name}: {previous[key]:.1f} -> {current[key]:.1f} ms '
+              f'(x{ratio:.2f}), statement {previous.get("statements")} -> {current.get("statements")}')
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(url, process, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('gunicorn berhenti saat start')
+        try:
+            urllib.request.urlopen(url, timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError('gunicorn tidak siap')
+
+
+@contextmanager
+def run_gunicorn(database_url, env=None, ready_path='/dashboard', log_path=None):
+    """
+    Jalankan app di gunicorn (gunicorn.conf.py, FLASK_ENV=production) dengan
+    database dan direktori upload/export sementara.
+    Yields: (base_url, process)
+    """
+    workdir = tempfile.mkdtemp()
+    port = _free_port()
+    process_env = dict(os.environ, FLASK_ENV='production', DATABASE_URL=database_url,
+                       PORT=str(port), UPLOAD_FOLDER=os.path.join(workdir, 'uploads'),
+                       EXPORT_DIR=os.path.join(workdir, 'exports'),
+                       METRICS_DIR=os.path.join(workdir, 'metrics'), **(env or {}))
+    log = open(log_path, 'w') if log_path else subprocess.DEVNULL
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', os.path.join(ROOT, 'gunicorn.conf.py'),
+         '--pythonpath', ROOT, '--access-logfile', os.devnull, 'run:app'],
+        cwd=workdir, env=process_env, stdout=log, stderr=log
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    try:
+        _wait_ready(base_url + ready_path, process)
+        yield base_url, process
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+        if log_path:
+            log.close()
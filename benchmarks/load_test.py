@@ -0,0 +1,276 @@
+"""
+Load test end-to-end: app dijalankan di gunicorn (gunicorn.conf.py) terhadap
+database SQLite lokal yang sudah di-seed, lalu sejumlah virtual user
+memutar campuran traffic (dashboard, pencarian, tambah_laporan dengan upload
+bukti, statistik, export). Dilaporkan p50/p95/p99 dan error rate per route;
+exit code 1 jika ada SLO yang terlewati.
+
+Campuran traffic, SLO dan parameter lain bisa diatur dengan file JSON:
+    {"users": 40, "duration": 120, "mix": {"dashboard": 30, "tambah_laporan": 40},
+     "slo": {"*": {"p95_ms": 800}, "tambah_laporan": {"p99_ms": 3000, "error_rate": 0.005}}}
+
+Usage:
+    python benchmarks/load_test.py [--rows 50000] [--users 30] [--duration 60] [--config loadtest.json]
+    python benchmarks/load_test.py --output load_results.json --server-log gunicorn.log
+"""
+import argparse
+import http.cookiejar
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from http.client import HTTPException
+from urllib.parse import urlencode
+
+from common import BenchConfig, create_bench_app, ensure_realistic_rows, bench_metadata, run_gunicorn, write_results
+from app import db
+
+# Bobot relatif per aksi virtual user (pola jam ramai pergantian shift)
+TRAFFIC_MIX = {
+    'dashboard': 35,
+    'search': 25,
+    'tambah_laporan': 20,
+    'statistik': 10,
+    'detail': 5,
+    'export_csv': 5,
+}
+
+# Batas per route; '*' berlaku untuk route yang tidak disebut
+SLO = {
+    '*': {'p95_ms': 1000, 'p99_ms': 2500, 'error_rate': 0.01},
+    'tambah_laporan': {'p95_ms': 1500, 'p99_ms': 3000, 'error_rate': 0.01},
+    'export_csv': {'p95_ms': 4000, 'p99_ms': 8000, 'error_rate': 0.01},
+}
+
+SEARCH_WORDS = ['billing', 'printer', 'pasien', 'resep', 'timeout', 'klaim', 'kasir']
+CSRF_PATTERN = re.compile(r'name="csrf_token" type="hidden" value="([^"]+)"')
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    # Redirect setelah POST adalah tanda sukses; jangan ikut diukur
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+def _multipart(fields, files):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, (filename, content, mimetype) in files.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                     f'Content-Type: {mimetype}\r\n\r\n'.encode() + content + b'\r\n')
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+class VirtualUser:
+    """Satu pengguna browser: cookie session sendiri, aksi dipilih dari mix"""
+
+    def __init__(self, base_url, args, rnd, record):
+        self.base_url = base_url
+        self.args = args
+        self.rnd = rnd
+        self.record = record
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _NoRedirect)
+
+    def request(self, route, path, data=None, headers=None, expect=(200,)):
+        request = urllib.request.Request(self.base_url + path, data=data, headers=headers or {})
+        started = time.perf_counter()
+        status, body = None, b''
+        try:
+            with self.opener.open(request, timeout=60) as response:
+                status, body = response.status, response.read()
+        except urllib.error.HTTPError as e:
+            status = e.code
+        except (OSError, HTTPException):
+            status = None
+        self.record(route, time.perf_counter() - started, status in expect)
+        return body
+
+    def dashboard(self):
+        self.request('dashboard', f'/dashboard?page={self.rnd.randint(1, 20)}')
+
+    def search(self):
+        params = {'search_query': self.rnd.choice(SEARCH_WORDS)}
+        if self.rnd.random() < 0.5:
+            params['status_filter'] = self.rnd.choice(['pending', 'in_progress', 'resolved'])
+        if self.rnd.random() < 0.3:
+            params['unit_filter'] = self.rnd.choice(['IGD', 'Rawat Inap', 'Farmasi', 'Kasir'])
+        self.request('search', '/dashboard?' + urlencode(params))
+
+    def statistik(self):
+        self.request('statistik', '/statistik')
+
+    def detail(self):
+        self.request('detail', f'/detail/{self.rnd.randint(1, self.args.rows)}')
+
+    def export_csv(self):
+        start = datetime(2025, 1, 1) + timedelta(days=self.rnd.randrange(300))
+        params = {'format': 'csv', 'unit_filter': self.rnd.choice(['IGD', 'Farmasi', 'Kasir']),
+                  'date_from': start.strftime('%Y-%m-%d'),
+                  'date_to': (start + timedelta(days=30)).strftime('%Y-%m-%d')}
+        self.request('export_csv', '/export?' + urlencode(params))
+
+    def tambah_laporan(self):
+        html = self.request('tambah_form', '/tambah').decode('utf-8', 'replace')
+        match = CSRF_PATTERN.search(html)
+        fields = {
+            'csrf_token': match.group(1) if match else '',
+            'unit': self.rnd.choice(['IGD', 'Rawat Inap', 'Rawat Jalan', 'Farmasi']),
+            'pelapor': f'Perawat Shift {self.rnd.randint(1, 200)}',
+            'modul_simrs': 'Pendaftaran & Front Office',
+            'jenis_kesalahan': self.rnd.choice(['Data Pasien', 'Transaksi', 'Sistem Error']),
+            'deskripsi': 'Load test: ' + ' '.join(self.rnd.sample(SEARCH_WORDS, 3)),
+            'tgl_kejadian': datetime.now().strftime('%Y-%m-%dT%H:%M'),
+        }
+        files = {}
+        if self.rnd.random() < self.args.upload_ratio:
+            # Isi unik per upload supaya tidak tertolong dedup content-addressed
+            content = b'%PDF-1.4\n' + os.urandom(self.args.upload_kb * 1024)
+            files['bukti_file'] = (f'bukti_{uuid.uuid4().hex[:8]}.pdf', content, 'application/pdf')
+        body, content_type = _multipart(fields, files)
+        self.request('tambah_laporan', '/tambah', data=body,
+                     headers={'Content-Type': content_type}, expect=(302, 303))
+
+    def run(self, mix, stop_at):
+        actions, weights = list(mix), list(mix.values())
+        while time.time() < stop_at:
+            getattr(self, self.rnd.choices(actions, weights)[0])()
+            if self.args.think:
+                time.sleep(self.rnd.expovariate(1 / self.args.think))
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples, elapsed):
+    """samples: route -> list of (latency detik, ok). Returns: dict per route"""
+    summary = {}
+    for route, items in sorted(samples.items()):
+        latencies = sorted(latency * 1000 for latency, ok in items)
+        errors = sum(1 for latency, ok in items if not ok)
+        summary[route] = {
+            'requests': len(items),
+            'rps': round(len(items) / elapsed, 2),
+            'p50_ms': round(_percentile(latencies, 50), 1),
+            'p95_ms': round(_percentile(latencies, 95), 1),
+            'p99_ms': round(_percentile(latencies, 99), 1),
+            'max_ms': round(latencies[-1], 1),
+            'errors': errors,
+            'error_rate': round(errors / len(items), 4),
+        }
+    return summary
+
+
+def check_slo(summary, slo):
+    """Returns: list pelanggaran (route, metrik, nilai, batas)"""
+    violations = []
+    for route, result in summary.items():
+        limits = dict(slo.get('*', {}), **slo.get(route, {}))
+        for metric, limit in limits.items():
+            if result.get(metric) is not None and result[metric] > limit:
+                violations.append((route, metric, result[metric], limit))
+    return violations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--config', help='File JSON: users, duration, mix, slo, ...')
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--users', type=int, default=30, help='Jumlah virtual user bersamaan')
+    parser.add_argument('--duration', type=float, default=60, help='Durasi pengukuran (detik)')
+    parser.add_argument('--ramp', type=float, default=5, help='Waktu menyalakan semua user; tidak diukur')
+    parser.add_argument('--think', type=float, default=0.5, help='Rata-rata jeda antar aksi per user (detik)')
+    parser.add_argument('--upload-kb', type=int, default=256, help='Ukuran bukti yang diupload')
+    parser.add_argument('--upload-ratio', type=float, default=0.7, help='Porsi tambah_laporan dengan bukti')
+    parser.add_argument('--workers', type=int, help='WEB_CONCURRENCY gunicorn (default dari CPU)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Tulis hasil JSON ke file ini')
+    parser.add_argument('--server-log', help='Simpan stderr gunicorn ke file ini')
+    args = parser.parse_args()
+
+    mix, slo = dict(TRAFFIC_MIX), {route: dict(limits) for route, limits in SLO.items()}
+    if args.config:
+        with open(args.config) as f:
+            config = json.load(f)
+        mix = config.pop('mix', mix)
+        for route, limits in config.pop('slo', {}).items():
+            slo.setdefault(route, {}).update(limits)
+        for key, value in config.items():
+            setattr(args, key.replace('-', '_'), value)
+
+    database_url = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'loadtest.db')
+    app = create_bench_app(type('LoadTestConfig', (BenchConfig,), {'SQLALCHEMY_DATABASE_URI': database_url}))
+    with app.app_context():
+        ensure_realistic_rows(args.rows, seed_value=args.seed)
+        metadata = bench_metadata(rows=args.rows, users=args.users, duration=args.duration,
+                                  think=args.think, mix=mix, slo=slo)
+        db.engine.dispose()
+
+    samples = defaultdict(list)
+    lock = threading.Lock()
+    measure_from = time.time() + args.ramp
+
+    def record(route, latency, ok):
+        # Request yang dimulai selama ramp-up tidak dihitung
+        if time.time() - latency < measure_from:
+            return
+        with lock:
+            samples[route].append((latency, ok))
+
+    env = {'WEB_CONCURRENCY': str(args.workers)} if args.workers else {}
+    with run_gunicorn(database_url, env, log_path=args.server_log) as (base_url, process):
+        stop_at = measure_from + args.duration
+        threads = []
+        for i in range(args.users):
+            user = VirtualUser(base_url, args, random.Random(args.seed + i), record)
+            thread = threading.Thread(target=user.run, args=(mix, stop_at), daemon=True)
+            threads.append(thread)
+            thread.start()
+            time.sleep(args.ramp / args.users)
+        for thread in threads:
+            thread.join()
+
+    summary = summarize(samples, args.duration)
+    violations = check_slo(summary, slo)
+    failed_routes = {route for route, *rest in violations}
+
+    print(f"{'route':<16}{'req':>7}{'req/s':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'error':>8}")
+    for route, result in summary.items():
+        print(f"{route:<16}{result['requests']:>7}{result['rps']:>8}{result['p50_ms']:>9}"
+              f"{result['p95_ms']:>9}{result['p99_ms']:>9}{result['error_rate']:>8.2%}"
+              f"  {'SLO GAGAL' if route in failed_routes else ''}")
+
+    if args.output:
+        metadata['slo_violations'] = [
+            {'route': route, 'metric': metric, 'value': value, 'limit': limit}
+            for route, metric, value, limit in violations
+        ]
+        write_results(args.output, metadata, summary)
+        print(f'\nHasil ditulis ke {args.output}')
+
+    if violations:
+        print()
+        for route, metric, value, limit in violations:
+            print(f'SLO terlewati: {route} {metric}={value} (batas {limit})')
+        sys.exit(1)
+    print('\nSemua route memenuhi SLO.')
+
+
+if __name__ == '__main__':
+    main()
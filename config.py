@@ -3,16 +3,119 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+def engine_options(uri, pool_size=5, max_overflow=10, pool_recycle=1800, pool_timeout=30):
+    """
+    SQLALCHEMY_ENGINE_OPTIONS sesuai jenis database.
+    Pool hanya diatur untuk server database (Postgres/MySQL); SQLite memakai
+    pool bawaan SQLAlchemy dan diatur lewat SQLITE_PRAGMAS. Hasilnya dict
+    biasa supaya config tetap bisa di-pickle (export EXPORT_EXECUTOR=process).
+    """
+    options = {'pool_pre_ping': True}
+    if uri.startswith('sqlite'):
+        return options
+    options.update(
+        pool_size=int(os.environ.get('DB_POOL_SIZE', pool_size)),
+        max_overflow=int(os.environ.get('DB_MAX_OVERFLOW', max_overflow)),
+        pool_recycle=int(os.environ.get('DB_POOL_RECYCLE', pool_recycle)),
+        pool_timeout=int(os.environ.get('DB_POOL_TIMEOUT', pool_timeout)),
+    )
+    return options
+
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///instance/database.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+    
+    # PRAGMA yang dijalankan setiap koneksi SQLite baru: WAL supaya pembaca
+    # tidak terblokir saat ada penulisan, busy_timeout (ms) untuk antre
+    # penulis, cache_size negatif = KiB per koneksi
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,
+        'cache_size': -16000,
+    }
     
     # Upload settings - use app/static/uploads for Railway
-    UPLOAD_FOLDER = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'app', 'static', 'uploads')
+    UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER') or \
+        os.path.join(os.path.abspath(os.path.dirname(__file__)), 'app', 'static', 'uploads')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
+    # Blob yang baru dipakai upload lain (dedup, belum commit) tidak dihapus selama ini
+    UPLOAD_DELETE_GRACE = int(os.environ.get('UPLOAD_DELETE_GRACE', 600))
+    THUMBNAIL_WORKERS = 1  # thread pembuat thumbnail/preview per worker gunicorn
     ALLOWED_EXTENSIONS = {'txt', 'pdf', 'png', 'jpg', 'jpeg', 'gif', 'doc', 'docx', 'xls', 'xlsx'}
     
+    # Download bukti lewat front proxy: None (dikirim Python), 'x-sendfile'
+    # (Apache/lighttpd) atau 'x-accel' (nginx, lokasi internal EVIDENCE_ACCEL_PREFIX)
+    EVIDENCE_OFFLOAD = os.environ.get('EVIDENCE_OFFLOAD') or None
+    EVIDENCE_ACCEL_PREFIX = os.environ.get('EVIDENCE_ACCEL_PREFIX', '/_protected_uploads/')
+    EVIDENCE_MAX_AGE = 31536000  # 1 tahun; nama file bukti tidak pernah berubah isinya
+    
+    # Dashboard pagination: 'offset' (nomor halaman) atau 'keyset' (cursor,
+    # biaya halaman dalam sama dengan halaman pertama)
+    DASHBOARD_PAGINATION = os.environ.get('DASHBOARD_PAGINATION', 'offset')
+    DASHBOARD_PER_PAGE = 10
+    
+    # Cache: 'memory' (per proses), 'file' (dibagi antar worker di satu host)
+    # atau 'redis' (butuh package redis dan CACHE_REDIS_URL). Dengan beberapa
+    # worker gunicorn pakai 'file' atau 'redis': invalidasi backend 'memory'
+    # hanya terjadi di worker yang menangani perubahan, worker lain menunggu TTL
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+    CACHE_DIR = os.environ.get('CACHE_DIR') or os.path.join(os.path.abspath(os.path.dirname(__file__)), 'instance', 'cache')
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL')
+    CACHE_DEFAULT_TIMEOUT = 3600
+    CACHE_MEMORY_TIMEOUT = int(os.environ.get('CACHE_MEMORY_TIMEOUT', 60))  # batas basi antar worker
+    
+    # Cache user_loader flask-login (per proses): umur snapshot dan jumlah entri
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 60))
+    USER_CACHE_SIZE = 1024
+    # Di atas jumlah user aktif ini, form edit status memakai lookup /users/assignees
+    ASSIGNEE_INLINE_LIMIT = 200
+    
+    # Cache hasil render dashboard/statistik per proses (jumlah halaman; 0 = nonaktif)
+    PAGE_CACHE_SIZE = int(os.environ.get('PAGE_CACHE_SIZE', 128))
+    
+    # JSON API /api/v1
+    API_DEFAULT_LIMIT = 50
+    API_MAX_LIMIT = 500
+    API_COMPRESS_MIN_SIZE = 1024  # byte; response lebih kecil tidak dikompres
+    
+    # Aksi massal ubah status/assign (POST /bulk_update)
+    BULK_UPDATE_MAX_IDS = 5000  # lebih dari ini gunakan filter pencarian
+    
+    # Import laporan massal (POST /import, flask import-laporan)
+    IMPORT_BATCH_SIZE = 1000  # baris per transaksi insert
+    IMPORT_MAX_REPORTED_ERRORS = 1000  # error per baris di response JSON
+    
+    # Export di background (/export?async=1)
+    EXPORT_DIR = os.environ.get('EXPORT_DIR') or os.path.join(os.path.abspath(os.path.dirname(__file__)), 'instance', 'exports')
+    EXPORT_EXECUTOR = os.environ.get('EXPORT_EXECUTOR', 'thread')  # thread atau process
+    EXPORT_WORKERS = int(os.environ.get('EXPORT_WORKERS', 1))  # per worker gunicorn
+    EXPORT_MAX_PENDING = 4  # job antre/berjalan per worker gunicorn
+    EXPORT_RETENTION = 3600  # detik sebelum file export dihapus
+    EXPORT_HEARTBEAT_INTERVAL = 10  # detik antar heartbeat job antre/berjalan
+    EXPORT_HEARTBEAT_TIMEOUT = 60  # tanpa heartbeat selama ini job dianggap gagal
+    
+    # Instrumentasi request/SQL dan endpoint /metrics (format Prometheus)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1').lower() in ('1', 'true', 'yes')
+    METRICS_DIR = os.environ.get('METRICS_DIR') or os.path.join(os.path.abspath(os.path.dirname(__file__)), 'instance', 'metrics')
+    METRICS_FLUSH_INTERVAL = 1.0  # detik antar penulisan snapshot per worker
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')  # jika diisi, /metrics butuh Authorization: Bearer
+    SLOW_QUERY_MS = int(os.environ.get('SLOW_QUERY_MS', 500))  # 0 = tidak ada log slow query
+
+    # Logging JSON non-blocking (lihat app/log.py); tidak aktif saat debug/testing
+    LOG_FILE = os.environ.get('LOG_FILE', os.path.join('logs', 'bap_simrs.log'))  # kosong = tanpa file
+    LOG_MAX_BYTES = int(os.environ.get('LOG_MAX_BYTES', 10 * 1024 * 1024))  # ukuran sebelum rotasi
+    LOG_BACKUP_COUNT = int(os.environ.get('LOG_BACKUP_COUNT', 10))  # jumlah file lama yang disimpan
+    # 'size' (RotatingFileHandler) atau 'external' (logrotate). Rotasi 'size' dengan
+    # beberapa worker gunicorn butuh {pid} di LOG_FILE; tanpa itu log ke stdout
+    LOG_ROTATION = os.environ.get('LOG_ROTATION', 'size')
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+    LOG_STDOUT = os.environ.get('LOG_STDOUT', '0').lower() in ('1', 'true', 'yes')
+    LOG_REQUESTS = os.environ.get('LOG_REQUESTS', '1').lower() in ('1', 'true', 'yes')  # satu baris per request
+    LOG_QUEUE_SIZE = 10000  # record di atas ini dibuang, thread request tidak menunggu
+    
     # Session settings
     PERMANENT_SESSION_LIFETIME = 3600  # 1 hour
     
@@ -29,6 +132,9 @@ class ProductionConfig(Config):
     if uri and uri.startswith('postgres://'):
         uri = uri.replace('postgres://', 'postgresql://', 1)
     SQLALCHEMY_DATABASE_URI = uri or Config.SQLALCHEMY_DATABASE_URI
+    # Thread pool berbagi GIL dengan thread request gunicorn; proses terpisah
+    # menjaga latency dashboard selama export besar berjalan
+    EXPORT_EXECUTOR = os.environ.get('EXPORT_EXECUTOR', 'process')
     
     # Security
     SESSION_COOKIE_SECURE = False  # Set to True only if using HTTPS
@@ -37,4 +143,6 @@ class ProductionConfig(Config):
 
 class DevelopmentConfig(Config):
     DEBUG = True
-    TESTING = False
\ No newline at end of file
+    TESTING = False
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(Config.SQLALCHEMY_DATABASE_URI, pool_size=2,
+                                               max_overflow=3, pool_recycle=3600)
@@ -0,0 +1,93 @@
+"""
+Konfigurasi gunicorn BAP SIMRS.
+
+Dibaca otomatis oleh ``gunicorn run:app`` dari direktori kerja, atau
+eksplisit dengan ``gunicorn -c gunicorn.conf.py run:app``. Semua nilai bisa
+diubah lewat environment:
+
+- GUNICORN_WORKER_CLASS: ``sync`` (default) atau ``gthread``. Dengan preload,
+  sync memakai memori paling kecil dengan throughput setara (lihat README);
+  gthread untuk beban dengan banyak request lambat (export besar, upload)
+- WEB_CONCURRENCY: jumlah worker; default dari jumlah CPU
+  (gthread: CPU + 1, sync: 2 × CPU + 1), dibatasi DB_MAX_CONNECTIONS
+- GUNICORN_THREADS: thread per worker gthread; default ``pool_size`` engine
+  supaya setiap thread mendapat koneksi tanpa menunggu pool
+- GUNICORN_PRELOAD: ``1`` (default) memuat app sekali di master lalu fork;
+  pool koneksi warisan master dibuang di setiap worker (post_fork)
+- DB_MAX_CONNECTIONS: anggaran koneksi database untuk semua worker
+  (mis. max_connections Postgres dikurangi koneksi lain)
+- LOG_REQUESTS: ``1`` (default) mematikan access log gunicorn karena app
+  sudah mencatat setiap request sebagai JSON; ``0`` menyalakannya ke stdout
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import DevelopmentConfig, ProductionConfig
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def _cpu_count():
+    # sched_getaffinity mengikuti batas CPU container/cgroup cpuset
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+_config = ProductionConfig if os.environ.get('FLASK_ENV') == 'production' else DevelopmentConfig
+_engine_options = _config.SQLALCHEMY_ENGINE_OPTIONS
+# SQLite file memakai QueuePool bawaan SQLAlchemy (5 + 10)
+_pool_size = _engine_options.get('pool_size', 5)
+_pool_max = _pool_size + _engine_options.get('max_overflow', 10)
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+
+if worker_class == 'gthread':
+    threads = _env_int('GUNICORN_THREADS', _pool_size)
+    workers = _env_int('WEB_CONCURRENCY', _cpu_count() + 1)
+else:
+    threads = 1
+    workers = _env_int('WEB_CONCURRENCY', 2 * _cpu_count() + 1)
+
+# Setiap worker bisa memegang sampai pool_size + max_overflow koneksi
+_max_connections = _env_int('DB_MAX_CONNECTIONS', 0)
+if _max_connections:
+    workers = max(1, min(workers, _max_connections // _pool_max))
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1').lower() in ('1', 'true', 'yes')
+timeout = _env_int('GUNICORN_TIMEOUT', 120)
+keepalive = 5
+
+# Heartbeat worker di tmpfs supaya tidak tersendat I/O disk (Docker)
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+# LOG_REQUESTS aktif: app sudah menulis satu baris JSON per request (dengan
+# request_id dan duration_ms), access log teks gunicorn hanya menggandakannya
+accesslog = None if _config.LOG_REQUESTS else '-'
+errorlog = '-'
+
+
+def on_starting(server):
+    # Snapshot metrics worker dari run sebelumnya tidak boleh ikut dijumlahkan
+    from app.metrics import clear_metrics_dir
+    clear_metrics_dir(_config.METRICS_DIR)
+    server.log.info(f'Worker {worker_class}: {workers} worker x {threads} thread, '
+                    f'preload_app={preload_app}, pool DB per worker={_pool_max}')
+
+
+def post_fork(server, worker):
+    """Worker tidak boleh memakai koneksi database yang dibuka master"""
+    if not preload_app:
+        return
+    import run
+    from app.models import db
+    from app.engine import dispose_engines
+    dispose_engines(run.app, db)
@@ -4,6 +4,7 @@ Run this after deployment to setup database and create admin user
 """
 from app import create_app, db
 from app.models import User
+from app.schema import upgrade_schema
 from config import ProductionConfig
 import os
 
@@ -18,6 +19,11 @@ def init_database():
         db.create_all()
         print("✓ Database tables created")
         
+        created_indexes = upgrade_schema(db.engine)
+        for name in created_indexes:
+            print(f"✓ Index {name} created")
+        print("✓ Indexes and full-text search ready")
+        
         # Check if admin exists
         admin = User.query.filter_by(username='admin').first()
         if not admin:
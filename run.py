@@ -1,5 +1,6 @@
 from app import create_app, db
 from app.models import User
+from app.schema import upgrade_schema
 import os
 from config import DevelopmentConfig, ProductionConfig
 
@@ -11,6 +12,7 @@ def init_db():
     """Initialize database and create default admin user"""
     with app.app_context():
         db.create_all()
+        upgrade_schema(db.engine)
         
         # Create default admin if not exists
         from sqlalchemy import inspect
@@ -8,8 +8,8 @@ echo "📦 Initializing database..."
 python init_db.py
 
 # Get port from environment or use default
-PORT=${PORT:-8000}
+export PORT=${PORT:-8000}
 
-# Start gunicorn
+# Start gunicorn (worker, thread dan preload diatur di gunicorn.conf.py)
 echo "🌐 Starting web server on port $PORT..."
-exec gunicorn run:app --bind 0.0.0.0:$PORT --workers 2 --timeout 120 --log-level info --access-logfile - --error-logfile -
+exec gunicorn -c gunicorn.conf.py run:app